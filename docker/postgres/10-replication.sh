@@ -0,0 +1,4 @@
+#!/bin/bash
+# Allows streaming replication connections for the optional `postgres-replica` service
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
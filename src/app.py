@@ -1,20 +1,84 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from logging import getLogger
+import os
 
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import uvicorn
 
-from src.base_async.base_module import http_exception_handler, starlette_exception_handler, validation_exception_handler
-from src.injectors.connections import pg
-from src.routers import api_router
+from src.base_async.base_module import (
+    PhaseTimer,
+    RequestTimingMiddleware,
+    http_exception_handler,
+    starlette_exception_handler,
+    validation_exception_handler,
+)
+from src.config import config
+from src.injectors import profiling
+from src.injectors.change_log import change_log_pruner
+from src.injectors.connections import pg, pg_listener
+from src.injectors.tiering import access_tracker, storage_tiering
+from src.routers import admin_router, api_router, health_router, metrics_router
+
+startup_timer = PhaseTimer()
+startup_timer.record('import', time.perf_counter() - _import_started)
+
+# uvicorn configures handlers for its own loggers only
+logger = getLogger('uvicorn.error')
+
+
+async def bootstrap() -> None:
+    with startup_timer.phase('storage'):
+        try:
+            await asyncio.to_thread(os.makedirs, config.storage_dir, exist_ok=True)
+        except OSError:
+            logger.exception('Не удалось создать директорию хранилища')
+
+    with startup_timer.phase('db'):
+        await pg.setup()
+
+    logger.info(f'Приложение готово за {startup_timer.total_ms():.1f} мс, этапы (мс): {startup_timer.report()}')
+
+
+async def run_background_jobs(bootstrap_task: asyncio.Task) -> None:
+    await bootstrap_task
+    jobs = []
+    if config.pg.replicas:
+        jobs.append(pg.monitor_replicas())
+    if config.tiering.track_access:
+        jobs.append(access_tracker.run(config.tiering.access_flush_seconds))
+    if config.tiering.enabled or config.tiering.promote_on_access:
+        jobs.append(storage_tiering.run())
+    if config.change_feed.retention_days is not None:
+        jobs.append(change_log_pruner.run())
+    await asyncio.gather(*jobs)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    await pg.setup()
+    # Bootstrap runs in the background so the worker answers /healthz right away,
+    # /readyz reports 503 until the database and storage are usable
+    bootstrap_task = asyncio.create_task(bootstrap())
+    jobs_task = asyncio.create_task(run_background_jobs(bootstrap_task))
     yield
+    for task in (bootstrap_task, jobs_task):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if pg.is_ready:
+        try:
+            await access_tracker.flush()
+        except Exception:
+            logger.exception('Ошибка записи статистики обращений к файлам')
+    await pg_listener.close()
+    await pg.close()
 
 
 def setup_app() -> FastAPI:
@@ -29,12 +93,18 @@ def setup_app() -> FastAPI:
     app.add_exception_handler(StarletteHTTPException, starlette_exception_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
 
+    app.add_middleware(RequestTimingMiddleware, slow_requests=profiling.slow_requests)
+
+    app.include_router(health_router, tags=['Health'])
+    app.include_router(metrics_router, tags=['Metrics'])
+    app.include_router(admin_router, tags=['Admin'])
     app.include_router(api_router, prefix='/api')
 
     return app
 
 
-app = setup_app()
+with startup_timer.phase('setup_app'):
+    app = setup_app()
 
 
 def main() -> None:
@@ -1,3 +1,4 @@
+from .batching import BatchLoader  # noqa: F401
 from .config import ExternalPgConfig, PgConfig  # noqa: F401
 from .exception import (  # noqa: F401
     EXC,
@@ -13,3 +14,5 @@ from .model import (  # noqa: F401
     ValuedEnum,
     view,
 )
+from .profiling import RequestTimingMiddleware, SamplingProfiler, SlowRequestLog  # noqa: F401
+from .timing import PhaseTimer, current_phase_timer, timed_phase  # noqa: F401
@@ -0,0 +1,95 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class BatchLoader(Generic[K, V]):
+    """Coalesces concurrent single-key lookups into batched calls of `batch_fn`.
+
+    Keys requested within `window` seconds (or until `max_batch_size` distinct keys are collected)
+    are loaded with one `batch_fn(keys) -> {key: value}` call, missing keys resolve to None.
+    Concurrent lookups of a key that is already queued or being loaded share its result.
+    Results are not cached past the batch that produced them.
+    """
+
+    def __init__(
+            self,
+            batch_fn: Callable[[list[K]], Awaitable[dict[K, V]]],
+            max_batch_size: int = 100,
+            window: float = 0.002,
+    ):
+        """."""
+        self._batch_fn = batch_fn
+        self._max_batch_size = max_batch_size
+        self._window = window
+        self._pending: dict[K, asyncio.Future] = {}
+        self._in_flight: dict[K, asyncio.Future] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+        self.keys_loaded = 0
+
+    async def load(self, key: K) -> V | None:
+        self.requests += 1
+
+        future = self._pending.get(key) or self._in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self._max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._window, self._dispatch)
+
+        # A cancelled waiter must not cancel the shared future of the other waiters
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        self._in_flight.update(batch)
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future]) -> None:
+        self.batches += 1
+        self.keys_loaded += len(batch)
+        try:
+            result = await self._batch_fn(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        except BaseException:
+            # Cancelled (e.g. on shutdown) or interrupted: the waiters of the batch must not hang
+            for future in batch.values():
+                future.cancel()
+            raise
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(result.get(key))
+        finally:
+            for key, future in batch.items():
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'keys_loaded': self.keys_loaded,
+            'requests_per_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+        }
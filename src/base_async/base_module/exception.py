@@ -56,6 +56,10 @@ class ResponseException(ModuleExceptionPayload):
 
 class ErrorCode(Enum):
     BadRequest = ResponseException(code=400, msg='Bad Request')
+    Forbidden = ResponseException(code=403, msg='Доступ запрещён')
+
+    # 409 – Profiling Errors
+    ProfilerAlreadyRunning = ResponseException(code=409, msg='Профилирование уже запущено')
 
     # 404 – File Management Errors
     FileNotExists = ResponseException(code=404, msg='Файл с таким именем не найден')
@@ -65,6 +69,12 @@ class ErrorCode(Enum):
     FileDeletingError = ResponseException(code=500, msg='Ошибка во время удаления файла')
     FileDownloadingError = ResponseException(code=500, msg='Ошибка во время выгрузки файла из хранилища')
     FileMoveError = ResponseException(code=500, msg='Ошибка во время перемещения файла')
+    FileCopyError = ResponseException(code=500, msg='Ошибка во время копирования файла')
+
+    # 403 / 410 – Signed Download Errors
+    DownloadTokenInvalid = ResponseException(code=403, msg='Недействительная ссылка на скачивание')
+    DownloadTokenExpired = ResponseException(code=410, msg='Срок действия ссылки на скачивание истёк')
+    SignedUrlsDisabled = ResponseException(code=501, msg='Подписанные ссылки на скачивание не настроены')
 
     # 422 – Validation Errors
     ValidationError = ResponseException(code=422, msg='Ошибка валидации')
@@ -90,6 +100,7 @@ class EXC(HTTPException):
             exc: ErrorCode,
             data: dict[str, Any] = {},
     ) -> None:
+        self.error_code = exc
         error_response = exc.value.model_copy(
             update={'data': data},
         )
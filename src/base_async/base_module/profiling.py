@@ -0,0 +1,160 @@
+from collections import Counter, deque
+from datetime import datetime
+import sys
+import threading
+import time
+from typing import Any
+
+from .timing import PhaseTimer, current_phase_timer
+
+
+class SamplingProfiler:
+    """Low-overhead wall-clock sampling profiler of a single thread (the event loop one by default).
+
+    A daemon thread takes a stack snapshot of the target thread every `interval` seconds and
+    aggregates them as folded stacks (`frame;frame;frame count`), the input format of
+    flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, interval: float = 0.01, max_duration: float = 300):
+        """."""
+        self.interval = interval
+        self.max_duration = max_duration
+        self.samples = 0
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self._stacks: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float, thread_id: int | None = None) -> bool:
+        """Start sampling for `duration` seconds (capped by `max_duration`); False if already running."""
+        if self.is_running:
+            return False
+
+        with self._lock:
+            self._stacks = Counter()
+            self.samples = 0
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(thread_id or threading.get_ident(), min(duration, self.max_duration)),
+            name='sampling-profiler',
+            daemon=True,
+        )
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    @classmethod
+    def _format_frame(cls, frame: Any) -> str:
+        code = frame.f_code
+        name = getattr(code, 'co_qualname', code.co_name)
+        return f'{name} ({code.co_filename}:{code.co_firstlineno})'.replace(';', ',')
+
+    def _run(self, thread_id: int, duration: float) -> None:
+        deadline = time.monotonic() + duration
+        while not self._stop_event.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                break
+
+            stack = []
+            while frame is not None:
+                stack.append(self._format_frame(frame))
+                frame = frame.f_back
+
+            with self._lock:
+                self._stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+        self.finished_at = datetime.now()
+
+    def status(self) -> dict[str, Any]:
+        return {
+            'running': self.is_running,
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def folded(self) -> str:
+        with self._lock:
+            return ''.join(f'{stack} {count}\n' for stack, count in self._stacks.most_common())
+
+
+class SlowRequestLog:
+    """Ring buffer of requests slower than `threshold_ms` with their per-phase timings."""
+
+    def __init__(self, threshold_ms: float, capacity: int = 100):
+        """."""
+        self.threshold_ms = threshold_ms
+        self._entries: deque[dict[str, Any]] = deque(maxlen=capacity)
+
+    def add(self, scope: dict[str, Any], status_code: int | None, timer: PhaseTimer) -> None:
+        total_ms = timer.total_ms()
+        if total_ms < self.threshold_ms:
+            return
+
+        phases = timer.report()
+        phases['other'] = round(max(total_ms - sum(timer.phases.values()), 0.0), 3)
+        self._entries.append({
+            'at': datetime.now().isoformat(),
+            'method': scope.get('method'),
+            'path': scope.get('path'),
+            'query': scope.get('query_string', b'').decode('latin-1'),
+            'status': status_code,
+            'total_ms': round(total_ms, 3),
+            'phases': phases,
+        })
+
+    def entries(self) -> list[dict[str, Any]]:
+        return list(reversed(self._entries))
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware that times every HTTP request until its response starts.
+
+    Streamed responses (downloads, event streams) stay open for as long as the client reads them,
+    so only the time to their headers is counted. Code below it reports phases through
+    `timed_phase`, requests slower than the log threshold are stored in the `SlowRequestLog`.
+    """
+
+    def __init__(self, app: Any, slow_requests: SlowRequestLog):
+        """."""
+        self.app = app
+        self.slow_requests = slow_requests
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timer = PhaseTimer()
+        status_code = None
+
+        async def _send(message: dict[str, Any]) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                timer.stop()
+            await send(message)
+
+        token = current_phase_timer.set(timer)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            current_phase_timer.reset(token)
+            self.slow_requests.add(scope, status_code, timer)
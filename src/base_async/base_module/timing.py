@@ -0,0 +1,56 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+
+class PhaseTimer:
+    """Collects wall-clock durations of named phases (in milliseconds)."""
+
+    def __init__(self):
+        """."""
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+        self.phases: dict[str, float] = {}
+
+    def stop(self) -> None:
+        """Freeze the total, phases recorded afterwards are ignored."""
+        if self.finished_at is None:
+            self.finished_at = time.perf_counter()
+
+    def record(self, name: str, seconds: float) -> None:
+        if self.finished_at is not None:
+            return
+        self.phases[name] = self.phases.get(name, 0.0) + seconds * 1000
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def total_ms(self) -> float:
+        return ((self.finished_at or time.perf_counter()) - self.started_at) * 1000
+
+    def report(self) -> dict[str, float]:
+        return {name: round(ms, 3) for name, ms in self.phases.items()}
+
+
+current_phase_timer: ContextVar[PhaseTimer | None] = ContextVar('current_phase_timer', default=None)
+
+
+@contextmanager
+def timed_phase(name: str) -> Iterator[None]:
+    """Record the block into the timer of the current request, if there is one.
+
+    Phases should wrap leaf operations only: nested phases are counted twice.
+    """
+    timer = current_phase_timer.get()
+    if timer is None:
+        yield
+        return
+
+    with timer.phase(name):
+        yield
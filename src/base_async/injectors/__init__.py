@@ -1 +1,2 @@
-from .pg import AsyncPgConnectionInj  # noqa: F401
+from .pg import AsyncPgConnectionInj, PgReplica  # noqa: F401
+from .pg_listener import AsyncPgListenerInj  # noqa: F401
@@ -1,15 +1,50 @@
 import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import itertools
 from logging import getLogger
+import time
 
-from sqlalchemy.engine.url import URL
-from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker, create_async_engine
-from sqlalchemy_utils import create_database, database_exists
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    async_scoped_session,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel, text
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ..base_module import EXC, ErrorCode, PgConfig
 
 
+class PgReplica:
+    """Read replica engine with its session registry and passive health state."""
+
+    def __init__(self, url: URL, engine: AsyncEngine, pg: async_scoped_session):
+        """."""
+        self.url = url
+        self.engine = engine
+        self.pg = pg
+        self.down_until = 0.0
+
+    @property
+    def name(self) -> str:
+        return f'{self.url.host}:{self.url.port}'
+
+    @property
+    def is_available(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    def mark_down(self, timeout: float) -> None:
+        self.down_until = time.monotonic() + timeout
+
+    def mark_up(self) -> None:
+        self.down_until = 0.0
+
+
 class AsyncPgConnectionInj:
     """."""
 
@@ -20,6 +55,8 @@ class AsyncPgConnectionInj:
             acquire_attempts: int = 5,
             acquire_error_timeout: int = 5,
             init_statements: list[str] | None = None,
+            migration_statements: list[str] | None = None,
+            ping_timeout: float = 2,
     ):
         """."""
         self._conf = conf
@@ -27,46 +64,101 @@ class AsyncPgConnectionInj:
         self._acquire_attempts = acquire_attempts
         self._acquire_error_timeout = acquire_error_timeout
         self._init_statements = init_statements or []
+        self._migration_statements = migration_statements or []
+        self._ping_timeout = ping_timeout
+        self._engine: AsyncEngine | None = None
         self._pg: async_scoped_session | AsyncSession | None = None
+        self._session_fabric: async_sessionmaker | None = None
+        self._replicas: list[PgReplica] = []
+        self._replica_counter = itertools.count()
+        self._init_lock = asyncio.Lock()
         self._logger = getLogger(__name__)
 
-    def build_url(self, driver: str):
+    @property
+    def is_ready(self) -> bool:
+        return self._pg is not None
+
+    def build_url(self, database: str | None = None):
         return URL.create(
-            f"postgresql{'+asyncpg' if driver == 'async' else ''}",
+            'postgresql+asyncpg',
             username=self._conf.user,
             password=self._conf.password,
             host=self._conf.host,
             port=self._conf.port,
-            database=self._conf.database,
+            database=database or self._conf.database,
         )
 
-    async def _init_db(self):
+    async def _ensure_database(self):
+        # Maintenance connection to the default database: CREATE DATABASE can not run inside a transaction
         engine = create_async_engine(
-            url=self.build_url('async'),
-            echo=self._conf.debug,
-            query_cache_size=0,
+            url=self.build_url(database='postgres'),
+            isolation_level='AUTOCOMMIT',
+            poolclass=NullPool,
         )
+        try:
+            async with engine.connect() as conn:
+                exists = await conn.scalar(
+                    text('SELECT 1 FROM pg_database WHERE datname = :name'),
+                    {'name': self._conf.database},
+                )
+                if not exists:
+                    await conn.execute(text(f'CREATE DATABASE "{self._conf.database}"'))
+        finally:
+            await engine.dispose()
+
+    async def _init_db(self):
+        async with self._init_lock:
+            if self._pg is not None:
+                return
+
+            await self._ensure_database()
 
-        if not database_exists(self.build_url('sync')):
-            create_database(self.build_url('sync'))
+            engine = create_async_engine(
+                url=self.build_url(),
+                echo=self._conf.debug,
+                query_cache_size=0,
+            )
 
-        async with engine.begin() as conn:
-            await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS {self._conf.schema}'))
-            for stmt in self._init_statements:
-                await conn.execute(text(stmt))
-            await conn.run_sync(SQLModel.metadata.create_all)
+            async with engine.begin() as conn:
+                await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS {self._conf.schema}'))
+                for stmt in self._init_statements:
+                    await conn.execute(text(stmt))
+                await conn.run_sync(SQLModel.metadata.create_all)
+                # Idempotent statements for tables that already existed, run after create_all
+                for stmt in self._migration_statements:
+                    await conn.execute(text(stmt))
 
-        async_session_fabric = async_sessionmaker(
+            self._replicas = [self._create_replica(dsn) for dsn in self._conf.replicas]
+            self._engine = engine
+            self._session_fabric = self._create_session_fabric(engine)
+            self._pg = self._create_scoped_session(engine)
+
+    @classmethod
+    def _create_session_fabric(cls, engine: AsyncEngine) -> async_sessionmaker:
+        return async_sessionmaker(
             engine,
             class_=AsyncSession,
             expire_on_commit=False,
         )
 
-        self._pg = async_scoped_session(
-            async_session_fabric,
+    @classmethod
+    def _create_scoped_session(cls, engine: AsyncEngine) -> async_scoped_session:
+        return async_scoped_session(
+            cls._create_session_fabric(engine),
             scopefunc=asyncio.current_task,
         )
 
+    def _create_replica(self, dsn: str) -> PgReplica:
+        url = make_url(dsn).set(drivername='postgresql+asyncpg')
+        # Replicas are schema-less mirrors of the primary: nothing is created on them, the engine connects lazily
+        engine = create_async_engine(
+            url=url,
+            echo=self._conf.debug,
+            query_cache_size=0,
+            connect_args={'timeout': self._ping_timeout},
+        )
+        return PgReplica(url=url, engine=engine, pg=self._create_scoped_session(engine))
+
     async def init_db(self):
         while True:
             try:
@@ -76,14 +168,108 @@ class AsyncPgConnectionInj:
                 self._logger.error('Ошибка инициализации базы данны, ожидание', exc_info=True, extra={'e': e})
                 await asyncio.sleep(self._init_error_timeout)
 
+    async def ping(self, engine: AsyncEngine | None = None) -> bool:
+        """Check that the database (the primary by default) answers within `ping_timeout`; never raises."""
+        engine = engine or self._engine
+        if engine is None:
+            return False
+
+        async def _ping():
+            async with engine.connect() as conn:
+                await conn.execute(text('SELECT 1'))
+
+        try:
+            await asyncio.wait_for(_ping(), timeout=self._ping_timeout)
+        except Exception as e:
+            self._logger.warning('База данных недоступна', extra={'e': e})
+            return False
+        return True
+
+    async def _check_replica(self, replica: PgReplica) -> None:
+        if await self.ping(replica.engine):
+            replica.mark_up()
+        else:
+            replica.mark_down(self._conf.replica_retry_timeout)
+
+    async def check_replicas(self) -> None:
+        """Ping all replicas concurrently, updating their health state."""
+        await asyncio.gather(*(self._check_replica(replica) for replica in self._replicas))
+
+    def replica_states(self) -> dict[str, bool]:
+        """Last known availability of every replica; keys are `host:port`."""
+        return {replica.name: replica.is_available for replica in self._replicas}
+
+    async def monitor_replicas(self) -> None:
+        """Check replicas every `replica_check_interval` seconds, so a recovered one is used again."""
+        while True:
+            await self.check_replicas()
+            await asyncio.sleep(self._conf.replica_check_interval)
+
+    @classmethod
+    async def _open_session(cls, pg: async_scoped_session, role: str) -> async_scoped_session[AsyncSession]:
+        async with pg() as session, session.begin():
+            await session.execute(text(f'SET ROLE {role}'))
+            return session
+
     async def _acquire_session(self) -> async_scoped_session[AsyncSession]:
         if not self._pg:
             await self._init_db()
 
-        async with self._pg() as session, session.begin():
-            self._logger.info(f'Current role is {self._conf.user}')
+        self._logger.info(f'Current role is {self._conf.user}')
+        return await self._open_session(self._pg, self._conf.user)
+
+    @asynccontextmanager
+    async def session_scope(self) -> AsyncIterator[AsyncSession]:
+        """Short-lived primary session in its own transaction, not bound to the task-scoped registry.
+
+        For background work that serves many requests at once, e.g. batched lookups.
+        """
+        if not self._pg:
+            await self._init_db()
+
+        async with self._session_fabric() as session, session.begin():
             await session.execute(text(f'SET ROLE {self._conf.user}'))
-            return session
+            yield session
+
+    @asynccontextmanager
+    async def autocommit_connection(self) -> AsyncIterator[AsyncConnection]:
+        """Primary connection outside of any transaction.
+
+        For session-level state held for a long time, e.g. an advisory lock, without keeping a transaction idle.
+        """
+        if not self._pg:
+            await self._init_db()
+
+        async with self._engine.connect() as conn:
+            yield await conn.execution_options(isolation_level='AUTOCOMMIT')
+
+    def is_primary_session(self, session: AsyncSession | async_scoped_session) -> bool:
+        return self._engine is not None and session.bind is self._engine
+
+    async def acquire_read_session(self) -> async_scoped_session[AsyncSession]:
+        """Session for read-only queries: next available replica in round-robin order.
+
+        A replica that fails to open a session is skipped for `replica_retry_timeout` seconds.
+        Falls back to the primary when no replicas are configured or none is available.
+        """
+        if not self._pg:
+            await self._init_db()
+
+        for _ in range(len(self._replicas)):
+            replica = self._replicas[next(self._replica_counter) % len(self._replicas)]
+            if not replica.is_available:
+                continue
+            try:
+                return await self._open_session(replica.pg, replica.url.username)
+            except Exception as e:
+                self._logger.warning(
+                    'Реплика базы данных недоступна, запрос перенаправлен',
+                    exc_info=True,
+                    extra={'e': e, 'replica': replica.name},
+                )
+                replica.mark_down(self._conf.replica_retry_timeout)
+
+        return await self.acquire_session()
 
     async def acquire_session(self) -> async_scoped_session[AsyncSession]:
         for i in range(self._acquire_attempts):
@@ -102,3 +288,8 @@ class AsyncPgConnectionInj:
     async def setup(self):
         await self.init_db()
 
+    async def close(self):
+        for replica in self._replicas:
+            await replica.engine.dispose()
+        if self._engine is not None:
+            await self._engine.dispose()
@@ -0,0 +1,70 @@
+import asyncio
+from logging import getLogger
+from typing import Any
+
+import asyncpg
+
+from ..base_module import PgConfig
+
+
+class AsyncPgListenerInj:
+    """Shared LISTEN connection of the process for one NOTIFY channel.
+
+    Subscribers take `next_event()` before reading their data and then wait on it: the event is
+    set by the next notification (or by a reconnect, after which notifications may have been lost),
+    so nothing is missed between the read and the wait. The connection is opened on first use
+    and re-established after failures.
+    """
+
+    def __init__(
+            self,
+            conf: PgConfig,
+            channel: str,
+            reconnect_timeout: int = 5,
+    ):
+        """."""
+        self._conf = conf
+        self._channel = channel
+        self._reconnect_timeout = reconnect_timeout
+        self._event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._logger = getLogger(__name__)
+
+    def next_event(self) -> asyncio.Event:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._event
+
+    def _notify_subscribers(self, *_: Any) -> None:
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def _run(self) -> None:
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(
+                    host=self._conf.host,
+                    port=self._conf.port,
+                    user=self._conf.user,
+                    password=self._conf.password,
+                    database=self._conf.database,
+                )
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+                await conn.add_listener(self._channel, self._notify_subscribers)
+                self._notify_subscribers()
+                await closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._logger.warning('Ошибка подписки на уведомления, ожидание повтора', exc_info=True, extra={'e': e})
+            finally:
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            await asyncio.sleep(self._reconnect_timeout)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
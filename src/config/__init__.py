@@ -6,6 +6,7 @@ import yaml
 from src.base_async.base_module import (
     ExternalPgConfig,
     Model,
+    ValuedEnum,
 )
 
 
@@ -13,6 +14,79 @@ class FileConfig(Model):
     """."""
 
     upload_chunk_size: int = Field(default=1024 * 1024 * 5)  # 5 MB
+    list_max_limit: int = Field(default=1000)
+    export_batch_size: int = Field(default=1000)
+    # In-memory cache of small files served by download, 0 disables it
+    hot_cache_max_bytes: int = Field(default=1024 * 1024 * 64)  # 64 MB
+    hot_cache_max_file_size: int = Field(default=1024 * 256)  # 256 KB
+    # Concurrent id lookups of downloads are coalesced into one query per window or per batch
+    id_batch_window_ms: float = Field(default=2)
+    id_batch_max_size: int = Field(default=100)
+
+
+class OffloadMode(ValuedEnum):
+    """."""
+
+    XAccelRedirect = 'x-accel-redirect'
+    XSendfile = 'x-sendfile'
+
+
+class DownloadOffloadConfig(Model):
+    """Hand file bytes over to the front proxy instead of streaming them from the worker."""
+
+    mode: OffloadMode | None = Field(default=None)
+    # X-Accel-Redirect: internal nginx location that maps to storage_dir
+    internal_prefix: str = Field(default='/protected_files')
+    # X-Sendfile: storage_dir as seen by the front proxy, storage_dir itself when not set
+    sendfile_root: str | None = Field(default=None)
+
+
+class SignedUrlConfig(Model):
+    """."""
+
+    # HMAC key of download tokens, signed URLs are disabled when not set
+    secret: str | None = Field(default=None)
+    default_ttl: int = Field(default=300)
+    max_ttl: int = Field(default=60 * 60 * 24)
+
+
+class ChangeFeedConfig(Model):
+    """."""
+
+    # Max changes read from the change log per query
+    batch_size: int = Field(default=500)
+    keepalive_seconds: int = Field(default=15)
+    # Changes older than this are pruned from the log, None keeps them forever
+    retention_days: float | None = Field(default=7)
+    prune_interval_seconds: int = Field(default=60 * 60)
+
+
+class TieringConfig(Model):
+    """Hot/cold storage tiers of files by last download time."""
+
+    enabled: bool = Field(default=False)
+    cold_dir: str = Field(default='storage_cold')
+    # Files not downloaded (or modified) for this many days are moved to cold_dir
+    cold_after_days: float = Field(default=30)
+    compress: bool = Field(default=False)
+    # Move a cold file back to the hot tier in the background when it is downloaded
+    promote_on_access: bool = Field(default=False)
+    interval_seconds: int = Field(default=60 * 60)
+    batch_size: int = Field(default=100)
+    # The previous copy of a switched file is kept this long, at least signed_urls.max_ttl
+    old_copy_grace_seconds: int = Field(default=60 * 60 * 24)
+    # Download statistics are kept even with tiering disabled
+    track_access: bool = Field(default=True)
+    access_flush_seconds: float = Field(default=10)
+
+
+class ProfilingConfig(Model):
+    """."""
+
+    sample_interval_ms: float = Field(default=10)
+    max_duration: int = Field(default=300)
+    slow_request_threshold_ms: float = Field(default=1000)
+    slow_request_capacity: int = Field(default=100)
 
 
 class ServiceConfig(Model):
@@ -21,6 +95,20 @@ class ServiceConfig(Model):
     pg: ExternalPgConfig = Field()
     storage_dir: str = Field(default='storage')
     file_config: FileConfig = Field(default=FileConfig())
+    # Token for the /admin endpoints (X-Admin-Token header), the endpoints are disabled when not set
+    admin_token: str | None = Field(default=None)
+    profiling: ProfilingConfig = Field(default=ProfilingConfig())
+    download_offload: DownloadOffloadConfig = Field(default=DownloadOffloadConfig())
+    signed_urls: SignedUrlConfig = Field(default=SignedUrlConfig())
+    change_feed: ChangeFeedConfig = Field(default=ChangeFeedConfig())
+    tiering: TieringConfig = Field(default=TieringConfig())
+
+
+def load_config(path: str) -> ServiceConfig:
+    # libyaml-backed loader is an order of magnitude faster when PyYAML is built with it
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(path) as f:
+        return ServiceConfig.load(yaml.load(f, Loader=loader) or {})  # noqa: S506
 
 
-config: ServiceConfig = ServiceConfig.load(yaml.safe_load(open(os.getenv('YAML_PATH', 'config.yaml'))) or {})
+config: ServiceConfig = load_config(os.getenv('YAML_PATH', 'config.yaml'))
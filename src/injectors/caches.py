@@ -0,0 +1,7 @@
+from src.config import config
+from src.services.file_cache import FileContentCache
+
+file_cache = FileContentCache(
+    max_bytes=config.file_config.hot_cache_max_bytes,
+    max_item_size=config.file_config.hot_cache_max_file_size,
+)
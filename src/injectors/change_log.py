@@ -0,0 +1,5 @@
+from src.config import config
+from src.services.change_log import ChangeLogPruner
+from . import connections
+
+change_log_pruner = ChangeLogPruner(config.change_feed, connections.pg.session_scope)
@@ -1,6 +1,13 @@
-from src.base_async.injectors import AsyncPgConnectionInj
+from src.base_async.injectors import AsyncPgConnectionInj, AsyncPgListenerInj
 from src.config import config
+from src.models import FILE_CHANGES_CHANNEL, FILE_MIGRATIONS
 
 pg = AsyncPgConnectionInj(
     conf=config.pg,
+    migration_statements=FILE_MIGRATIONS,
+)
+
+pg_listener = AsyncPgListenerInj(
+    conf=config.pg,
+    channel=FILE_CHANGES_CHANNEL,
 )
@@ -0,0 +1,19 @@
+from uuid import UUID
+
+from src.base_async.base_module import BatchLoader
+from src.config import config
+from src.models import File
+from src.services import FilesService
+from . import connections
+
+
+async def _load_files_by_ids(file_ids: list[UUID]) -> dict[UUID, File]:
+    async with connections.pg.session_scope() as session:
+        return await FilesService.select_files_by_ids(db=session, file_ids=file_ids)
+
+
+file_loader: BatchLoader[UUID, File] = BatchLoader(
+    _load_files_by_ids,
+    max_batch_size=config.file_config.id_batch_max_size,
+    window=config.file_config.id_batch_window_ms / 1000,
+)
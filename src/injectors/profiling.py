@@ -0,0 +1,12 @@
+from src.base_async.base_module import SamplingProfiler, SlowRequestLog
+from src.config import config
+
+profiler = SamplingProfiler(
+    interval=config.profiling.sample_interval_ms / 1000,
+    max_duration=config.profiling.max_duration,
+)
+
+slow_requests = SlowRequestLog(
+    threshold_ms=config.profiling.slow_request_threshold_ms,
+    capacity=config.profiling.slow_request_capacity,
+)
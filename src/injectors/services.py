@@ -1,12 +1,62 @@
+from collections.abc import Awaitable, Callable
+
+from fastapi import Header
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.base_async.base_module import timed_phase
 from src.config import config
 from src.services import FilesService
-from . import connections
+from . import caches, connections, loaders, tiering
 
+PrimarySession = Callable[[], Awaitable[AsyncSession]]
 
-async def files_service() -> FilesService:
-    session = await connections.pg.acquire_session()
+
+def _files_service(session: AsyncSession | None, primary_session: PrimarySession | None = None) -> FilesService:
     return FilesService(
         base_dir=config.storage_dir,
         pg=session,
-        upload_chunk_size=config.file_config.upload_chunk_size
+        upload_chunk_size=config.file_config.upload_chunk_size,
+        list_max_limit=config.file_config.list_max_limit,
+        export_batch_size=config.file_config.export_batch_size,
+        file_cache=caches.file_cache,
+        offload=config.download_offload,
+        signed_urls=config.signed_urls,
+        file_loader=loaders.file_loader,
+        next_change_event=connections.pg_listener.next_event,
+        change_feed=config.change_feed,
+        access_tracker=tiering.access_tracker if config.tiering.track_access else None,
+        tiering=tiering.storage_tiering,
+        primary_session=primary_session,
     )
+
+
+async def files_service() -> FilesService:
+    with timed_phase('db'):
+        session = await connections.pg.acquire_session()
+    return _files_service(session)
+
+
+async def files_read_service(x_read_primary: bool = Header(default=False)) -> FilesService:
+    """FilesService bound to a read replica session: only for read-only operations.
+
+    Replicas may lag behind the primary, a client that has to see its own recent writes sends
+    `X-Read-Primary: 1` to read from the primary instead. Lookups of a single file that miss on
+    a replica are retried on the primary.
+    """
+    with timed_phase('db'):
+        if x_read_primary:
+            session = await connections.pg.acquire_session()
+        else:
+            session = await connections.pg.acquire_read_session()
+    if connections.pg.is_primary_session(session):
+        return _files_service(session)
+    return _files_service(session, primary_session=connections.pg.acquire_session)
+
+
+async def files_storage_service() -> FilesService:
+    """FilesService without a request-bound session.
+
+    Only for operations that need no session of their own: signed downloads and id lookups
+    through the batching loader (downloads, issuing signed URLs).
+    """
+    return _files_service(None)
@@ -0,0 +1,14 @@
+from src.config import config
+from src.services.tiering import AccessTracker, StorageTiering
+from . import connections
+
+access_tracker = AccessTracker(connections.pg.session_scope)
+
+storage_tiering = StorageTiering(
+    base_dir=config.storage_dir,
+    conf=config.tiering,
+    # Signed URLs issued before a switch point at the previous copy until they expire
+    old_copy_grace_seconds=max(config.tiering.old_copy_grace_seconds, config.signed_urls.max_ttl),
+    session_scope=connections.pg.session_scope,
+    lock_connection=connections.pg.autocommit_connection,
+)
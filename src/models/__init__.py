@@ -1 +1,13 @@
-from .orm_models import File, FileCreate, FilePublic, FileUpdate  # noqa: F401
+from .orm_models import (  # noqa: F401
+    FILE_CHANGES_CHANNEL,
+    FILE_MIGRATIONS,
+    File,
+    FileChange,
+    FileChangeType,
+    FileCopy,
+    FileCreate,
+    FileDownloadUrl,
+    FilePublic,
+    FileTierRemoval,
+    FileUpdate,
+)
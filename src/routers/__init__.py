@@ -1,6 +1,9 @@
 from fastapi import APIRouter
 
+from .admin import router as admin_router  # noqa: F401
 from .files import router  # noqa: F401
+from .health import router as health_router  # noqa: F401
+from .metrics import router as metrics_router  # noqa: F401
 
 api_router = APIRouter()
 api_router.include_router(files.router, tags=['Files'])
@@ -0,0 +1,54 @@
+import hmac
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import PlainTextResponse
+
+from src.base_async.base_module import EXC, ErrorCode
+from src.config import config
+from src.injectors import profiling
+
+
+async def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not config.admin_token or not x_admin_token:
+        raise EXC(ErrorCode.Forbidden)
+    if not hmac.compare_digest(x_admin_token.encode(), config.admin_token.encode()):
+        raise EXC(ErrorCode.Forbidden)
+
+
+router = APIRouter(prefix='/admin', dependencies=[Depends(require_admin)])
+
+
+@router.post('/profiler/start')
+async def start_profiler(*, seconds: float = Query(default=30, gt=0)) -> dict[str, Any]:
+    """Start sampling the event loop thread of this worker for the given number of seconds."""
+    if not profiling.profiler.start(seconds):
+        raise EXC(ErrorCode.ProfilerAlreadyRunning)
+    return profiling.profiler.status()
+
+
+@router.post('/profiler/stop')
+async def stop_profiler() -> dict[str, Any]:
+    """Stop sampling before the requested duration elapses."""
+    profiling.profiler.stop()
+    return profiling.profiler.status()
+
+
+@router.get('/profiler')
+async def profiler_status() -> dict[str, Any]:
+    return profiling.profiler.status()
+
+
+@router.get('/profiler/result')
+async def profiler_result() -> PlainTextResponse:
+    """Download the last profile as folded stacks (flamegraph.pl / speedscope input)."""
+    return PlainTextResponse(
+        profiling.profiler.folded(),
+        headers={'Content-Disposition': 'attachment; filename="profile.folded"'},
+    )
+
+
+@router.get('/slow-requests')
+async def slow_requests() -> list[dict[str, Any]]:
+    """Requests slower than the configured threshold, newest first, with per-phase timings in ms."""
+    return profiling.slow_requests.entries()
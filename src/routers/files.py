@@ -1,14 +1,51 @@
+from datetime import datetime
 from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, File as FastapiFile, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, File as FastapiFile, Header, Query, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
+import orjson
 
-from src.injectors.services import files_service
-from src.services.files import FilePublic, FilesService, FileUpdate
+from src.injectors.services import files_read_service, files_service, files_storage_service
+from src.models import FileDownloadUrl
+from src.services.files import FileCopy, FilePublic, FilesService, FileUpdate
 
 router = APIRouter()
 
 
+def attachment_headers(filename: str) -> dict[str, str]:
+    return {'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename, safe='')}"}
+
+
+# Actions on a file use the `{id}:action` form: `{id}/action` would shadow uploads into a folder named `action`
+@router.post('/files/{id}:copy')
+async def copy_file(
+        *,
+        fs: FilesService = Depends(files_service),
+        copy: FileCopy,
+        id: str,
+) -> FilePublic:
+    """Copy a file to another path inside the storage without sending its bytes through the client."""
+    return await fs.copy_file(copy, id)
+
+
+@router.post('/files/{id}:signed-url')
+async def create_download_url(
+        *,
+        fs: FilesService = Depends(files_storage_service),
+        request: Request,
+        id: str,
+        ttl: int | None = Query(default=None, gt=0),
+) -> FileDownloadUrl:
+    """Issue a signed, expiring download URL that is served without database access."""
+    token, expires_at = await fs.issue_download_token(id, ttl)
+
+    return FileDownloadUrl(
+        url=str(request.url_for('download_signed_file', token=token)),
+        token=token,
+        expires_at=expires_at.isoformat(),
+    )
+
+
 @router.post('/files/{dir_path:path}')
 async def create_file(
         *,
@@ -31,25 +68,106 @@ async def update_file(
     return await fs.update_file(update, id)
 
 
+@router.get('/files/signed/{token}')
+async def download_signed_file(
+        *,
+        fs: FilesService = Depends(files_storage_service),
+        token: str,
+) -> Response:
+    """Download a file by a signed URL: the token is verified, the database is queried only for a file switched tiers."""
+    if fs.offload_enabled:
+        offload_headers, filename = await fs.get_signed_file_offload(token)
+        if offload_headers is not None:
+            return Response(
+                media_type='application/octet-stream',
+                headers={**offload_headers, **attachment_headers(filename)},
+            )
+
+    file_generator, filename = await fs.get_signed_file(token)
+
+    return StreamingResponse(
+        file_generator,
+        media_type='application/octet-stream',
+        headers=attachment_headers(filename),
+    )
+
+
 @router.get('/files/{id}/download')
 async def download_file(
         *,
-        fs: FilesService = Depends(files_service),
+        fs: FilesService = Depends(files_storage_service),
         id: str,
-) -> StreamingResponse:
-    """Download a file from storage."""
+) -> Response:
+    """Download a file from storage.
+
+    In offload mode only the file is resolved here, the bytes are sent by the front proxy.
+    Files in cold storage are always streamed by the worker.
+    """
+    if fs.offload_enabled:
+        offload_headers, filename = await fs.get_file_offload(id)
+        if offload_headers is not None:
+            return Response(
+                media_type='application/octet-stream',
+                headers={**offload_headers, **attachment_headers(filename)},
+            )
+
     file_generator, filename = await fs.get_file(id)
 
     return StreamingResponse(
         file_generator,
         media_type='application/octet-stream',
-        headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename, safe='')}"},
+        headers=attachment_headers(filename),
+    )
+
+
+@router.get('/files/export')
+async def export_files(
+        *,
+        fs: FilesService = Depends(files_read_service),
+        path_prefix: str | None = None,
+        updated_since: datetime | None = None,
+        updated_until: datetime | None = None,
+) -> StreamingResponse:
+    """Stream metadata of all files as NDJSON, optionally filtered for incremental syncs."""
+    rows_generator = await fs.export_files(
+        path_prefix=path_prefix,
+        updated_since=updated_since,
+        updated_until=updated_until,
+    )
+
+    return StreamingResponse(rows_generator, media_type='application/x-ndjson')
+
+
+@router.get('/files/changes')
+async def file_changes(
+        *,
+        fs: FilesService = Depends(files_service),
+        since: int | None = Query(default=None, ge=0),
+        path_prefix: str | None = None,
+        last_event_id: int | None = Header(default=None),
+) -> StreamingResponse:
+    """Subscribe to file changes as server-sent events, optionally resuming after a given sequence.
+
+    A reconnecting EventSource resumes from its `Last-Event-ID` header.
+    """
+    events_generator = await fs.stream_changes(
+        since=last_event_id if last_event_id is not None else since,
+        path_prefix=path_prefix,
+    )
+
+    return StreamingResponse(
+        events_generator,
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
     )
 
 
 @router.get('/files/{id}')
-async def get_file_info(*, fs: FilesService = Depends(files_service), id: str) -> FilePublic:
-    """Get metadata about a file."""
+async def get_file_info(*, fs: FilesService = Depends(files_read_service), id: str) -> FilePublic:
+    """Get metadata about a file.
+
+    Served by a replica; a file not found there is looked up on the primary, it may have just been uploaded.
+    """
     return await fs.get_file_info(id)
 
 
@@ -59,13 +177,18 @@ async def delete_file(*, fs: FilesService = Depends(files_service), id: str) ->
     return await fs.delete_file(id)
 
 
-@router.get('/files/')
+@router.get('/files/', response_model=list[FilePublic])
 async def list_all_files(
         *,
-        fs: FilesService = Depends(files_service),
+        fs: FilesService = Depends(files_read_service),
         for_dir: str | None = None,
-        skip: int = 0,
-        limit: int = 10,
-) -> list[FilePublic]:
-    """Get metadata for files with pagination."""
-    return await fs.list_files(for_dir=for_dir, skip=skip, limit=limit)
+        skip: int = Query(default=0, ge=0),
+        limit: int = Query(default=10, ge=1),
+) -> Response:
+    """Get metadata for files with pagination.
+
+    Rows are returned as plain dicts and encoded with orjson directly, bypassing response model validation.
+    `limit` is capped by `file_config.list_max_limit`.
+    """
+    rows = await fs.list_files(for_dir=for_dir, skip=skip, limit=limit)
+    return Response(orjson.dumps(rows), media_type='application/json')
@@ -0,0 +1,45 @@
+import os
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from src.config import config
+from src.injectors import connections
+
+router = APIRouter()
+
+
+@router.get('/healthz')
+async def healthz() -> dict[str, str]:
+    """Liveness probe: the worker is up and serving the event loop."""
+    return {'status': 'ok'}
+
+
+@router.get('/readyz')
+async def readyz() -> JSONResponse:
+    """Readiness probe: database and storage are usable.
+
+    Answers 503 with `starting` while bootstrap is still running and `unavailable` once it has
+    finished but a dependency check fails. The last known replica state (checked in the background)
+    is reported but does not affect readiness: reads fall back to the primary.
+    """
+    checks = {
+        'db': await connections.pg.ping(),
+        'storage': os.path.isdir(config.storage_dir) and os.access(config.storage_dir, os.W_OK),
+    }
+
+    if all(checks.values()):
+        status = 'ready'
+    elif not connections.pg.is_ready:
+        status = 'starting'
+    else:
+        status = 'unavailable'
+
+    content = {'status': status, 'checks': checks}
+    if connections.pg.is_ready:
+        content['replicas'] = connections.pg.replica_states()
+
+    return JSONResponse(
+        status_code=200 if status == 'ready' else 503,
+        content=content,
+    )
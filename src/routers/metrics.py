@@ -0,0 +1,19 @@
+from typing import Any
+
+from fastapi import APIRouter
+
+from src.injectors import caches, loaders
+
+router = APIRouter()
+
+
+@router.get('/metrics/file-cache')
+async def file_cache_metrics() -> dict[str, Any]:
+    """Hit rate and occupancy of the in-memory hot-file cache of this worker."""
+    return caches.file_cache.stats()
+
+
+@router.get('/metrics/file-loader')
+async def file_loader_metrics() -> dict[str, Any]:
+    """How many download id lookups of this worker were coalesced into how many queries."""
+    return loaders.file_loader.stats()
@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime, timedelta
+from logging import getLogger
+
+from sqlalchemy import delete
+
+from ..config import ChangeFeedConfig
+from ..models import FileChange
+from .tiering import SessionScope
+
+
+class ChangeLogPruner:
+    """Deletes change log entries older than `retention_days`."""
+
+    def __init__(self, conf: ChangeFeedConfig, session_scope: SessionScope):
+        """."""
+        self.conf = conf
+        self._session_scope = session_scope
+        self._logger = getLogger(__name__)
+
+    async def prune(self) -> int:
+        if self.conf.retention_days is None:
+            return 0
+
+        table = FileChange.__table__
+        cutoff = datetime.now().astimezone() - timedelta(days=self.conf.retention_days)
+        async with self._session_scope() as session:
+            conn = await session.connection()
+            result = await conn.execute(delete(table).where(table.c.created_at < cutoff))
+            return result.rowcount
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.prune()
+            except Exception as e:
+                self._logger.warning('Ошибка очистки журнала изменений файлов', exc_info=True, extra={'e': e})
+            await asyncio.sleep(self.conf.prune_interval_seconds)
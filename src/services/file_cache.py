@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from typing import Any
+
+
+class FileContentCache:
+    """Byte-bounded LRU cache of small file contents, keyed by file id and version.
+
+    The version is any value that changes together with the file content (`File.updated_at`),
+    so a stale entry is never served even if an invalidation was missed. The cache is local to
+    the worker process: invalidation in one worker does not reach the others, the version check
+    covers that case.
+    """
+
+    def __init__(self, max_bytes: int, max_item_size: int):
+        """."""
+        self.max_bytes = max_bytes
+        self.max_item_size = max_item_size
+        self._items: OrderedDict[str, tuple[Any, bytes]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.max_item_size > 0
+
+    def accepts(self, size: int | None) -> bool:
+        return self.enabled and size is not None and size <= min(self.max_item_size, self.max_bytes)
+
+    def get(self, file_id: str, version: Any) -> bytes | None:
+        item = self._items.get(file_id)
+        if item is None or item[0] != version:
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(file_id)
+        self.hits += 1
+        return item[1]
+
+    def put(self, file_id: str, version: Any, data: bytes) -> None:
+        if not self.accepts(len(data)):
+            return
+
+        self.invalidate(file_id)
+        self._items[file_id] = (version, data)
+        self._bytes += len(data)
+
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def invalidate(self, file_id: str) -> None:
+        item = self._items.pop(file_id, None)
+        if item is not None:
+            self._bytes -= len(item[1])
+
+    def stats(self) -> dict[str, Any]:
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / requests, 4) if requests else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._items),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'max_item_size': self.max_item_size,
+        }
@@ -1,19 +1,47 @@
 import asyncio
-from collections.abc import AsyncGenerator
-from datetime import datetime
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from datetime import datetime, timedelta
+import fcntl
+import gzip
 from logging import getLogger
 import os
 from pathlib import Path
 import shutil
+import stat
+from typing import Any
+from urllib.parse import quote
+from uuid import UUID
 
 import aiofiles
 from fastapi import UploadFile
-from sqlmodel import select
+import orjson
+from sqlalchemy.dialects.postgresql import REGCLASS
+from sqlmodel import cast, delete, func, or_, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.base_async.base_module import EXC, ErrorCode
+from src.base_async.base_module import EXC, BatchLoader, ErrorCode, timed_phase
 
-from ..models import File, FileCreate, FilePublic, FileUpdate
+from ..config import ChangeFeedConfig, DownloadOffloadConfig, OffloadMode, SignedUrlConfig
+from ..models import (
+    FILE_CHANGES_CHANNEL,
+    File,
+    FileChange,
+    FileChangeType,
+    FileCopy,
+    FileCreate,
+    FilePublic,
+    FileTierRemoval,
+    FileUpdate,
+)
+from .file_cache import FileContentCache
+from .signing import DownloadTokenSigner
+from .tiering import AccessTracker, StorageTiering, copy_tier_data
+
+# ioctl request to clone a file's extents (linux/fs.h), supported by btrfs, XFS with reflink, overlayfs on top of them
+FICLONE = 0x40049409
+
+# Key of the transaction-level advisory lock that orders change log inserts by commit ('FILECHNG')
+FILE_CHANGES_LOCK_KEY = 0x46494C4543484E47
 
 
 class FilesService:
@@ -23,12 +51,41 @@ class FilesService:
             self,
             base_dir: str,
             upload_chunk_size: int,
-            pg: AsyncSession,
+            pg: AsyncSession | None,
+            list_max_limit: int = 1000,
+            export_batch_size: int = 1000,
+            file_cache: FileContentCache | None = None,
+            offload: DownloadOffloadConfig | None = None,
+            signed_urls: SignedUrlConfig | None = None,
+            file_loader: BatchLoader[UUID, File] | None = None,
+            next_change_event: Callable[[], asyncio.Event] | None = None,
+            change_feed: ChangeFeedConfig | None = None,
+            access_tracker: AccessTracker | None = None,
+            tiering: StorageTiering | None = None,
+            primary_session: Callable[[], Awaitable[AsyncSession]] | None = None,
     ):
-        """."""
+        """`pg` may be None for a service used only by operations that do not touch the database.
+
+        `next_change_event` returns an event set by the next file change notification, see `stream_changes`.
+
+        `primary_session` is given when `pg` is a replica session: it opens a primary session for
+        lookups that miss on a replica lagging behind.
+        """
         self.base_dir = base_dir
         self._logger = getLogger()
         self._upload_chunk_size = upload_chunk_size
+        self._list_max_limit = list_max_limit
+        self._export_batch_size = export_batch_size
+        self._file_cache = file_cache
+        self._offload = offload
+        self._signed_urls = signed_urls
+        self._file_loader = file_loader
+        self._next_change_event = next_change_event
+        self._change_feed = change_feed or ChangeFeedConfig()
+        self._access_tracker = access_tracker
+        self._tiering = tiering
+        self._primary_session = primary_session
+        self._signer = DownloadTokenSigner(signed_urls.secret) if signed_urls and signed_urls.secret else None
         self._pg = pg
 
     @classmethod
@@ -40,18 +97,34 @@ class FilesService:
 
     @classmethod
     def _check_file(cls, path: str, invert: bool = False) -> None:
+        with timed_phase('io'):
+            is_file = os.path.isfile(path)
+
         if not invert:
-            if not os.path.isfile(path):
+            if not is_file:
                 raise EXC(ErrorCode.FileNotExists)
         else:
-            if os.path.isfile(path):
+            if is_file:
                 raise EXC(ErrorCode.FileAlreadyExists)
 
+    @classmethod
+    def _stat_file(cls, path: str) -> os.stat_result:
+        with timed_phase('io'):
+            try:
+                st = os.stat(path)
+            except OSError:
+                raise EXC(ErrorCode.FileNotExists)
+
+        if not stat.S_ISREG(st.st_mode):
+            raise EXC(ErrorCode.FileNotExists)
+        return st
+
     @classmethod
     def _secure_path_join(cls, base_path: str, rel_path: str) -> str:
-        base_path = Path(base_path).resolve()
-        rel = Path(rel_path.lstrip('/\\'))
-        target = (base_path / rel).resolve()
+        with timed_phase('path'):
+            base_path = Path(base_path).resolve()
+            rel = Path(rel_path.lstrip('/\\'))
+            target = (base_path / rel).resolve()
         try:
             target.relative_to(base_path)
         except ValueError:
@@ -59,9 +132,23 @@ class FilesService:
         return str(target)
 
     @classmethod
-    async def _select_file_by_id(cls, *, db: AsyncSession, file_id: str) -> File | None:
-        result = await db.exec(select(File).where(File.id == file_id))
-        return result.one_or_none()
+    async def _select_file_by_id(cls, *, db: AsyncSession, file_id: str, for_update: bool = False) -> File | None:
+        stmt = select(File).where(File.id == file_id)
+        if for_update:
+            # Keeps the storage tiering from moving the file bytes until the transaction ends
+            stmt = stmt.with_for_update()
+        with timed_phase('db'):
+            result = await db.exec(stmt)
+            return result.one_or_none()
+
+    @classmethod
+    async def select_files_by_ids(cls, *, db: AsyncSession, file_ids: list[UUID]) -> dict[UUID, File]:
+        """Batch lookup for `BatchLoader`: one `WHERE id IN (...)` query.
+
+        Not timed here: the batch runs in the context of the request that dispatched it, which times `load()`.
+        """
+        result = await db.exec(select(File).where(File.id.in_(file_ids)))
+        return {file.id: file for file in result}
 
     @classmethod
     async def _select_file_by_path(cls, *, db: AsyncSession, file_path: str) -> File | None:
@@ -71,8 +158,37 @@ class FilesService:
             File.extension == p.suffix,
             File.path == str(p.parent),
         )
-        res = await db.exec(stmt)
-        return res.one_or_none()
+        with timed_phase('db'):
+            res = await db.exec(stmt)
+            return res.one_or_none()
+
+    async def _publish_change(
+            self,
+            change_type: FileChangeType,
+            file: File,
+            old_file: dict[str, Any] | None = None,
+    ) -> None:
+        """Append to the change log and NOTIFY subscribers, within the current transaction.
+
+        Both become visible on commit only, a rolled back change is never announced. Writers
+        are serialized from here to commit, so `seq` grows in commit order and a subscriber that
+        has seen a `seq` has seen every committed change before it.
+        """
+        await self._pg.exec(select(func.pg_advisory_xact_lock(FILE_CHANGES_LOCK_KEY)))
+        change = FileChange.from_file(change_type, file, old_file)
+        self._pg.add(change)
+        await self._pg.flush()
+        await self._pg.exec(select(func.pg_notify(FILE_CHANGES_CHANNEL, str(change.seq))))
+
+    async def _release_old_copies(self, file: File) -> list[str]:
+        """Drop pending removals of copies the file left at previous tiers and return their paths.
+
+        For a file being deleted or moved: its old paths are freed right away, within the transaction.
+        """
+        result = await self._pg.exec(
+            delete(FileTierRemoval).where(FileTierRemoval.file_id == file.id).returning(FileTierRemoval.path)
+        )
+        return list(result.scalars())
 
     async def add_file(
             self,
@@ -93,20 +209,25 @@ class FilesService:
             self._make_directory(target_dir)
 
             try:
-                async with aiofiles.open(full_path, 'wb') as out_file:
-                    while chunk := await file.read(self._upload_chunk_size):
-                        await out_file.write(chunk)
+                with timed_phase('io'):
+                    async with aiofiles.open(full_path, 'wb') as out_file:
+                        while chunk := await file.read(self._upload_chunk_size):
+                            await out_file.write(chunk)
             except Exception as e:
                 self._logger.warning(f'{e}')
                 raise EXC(ErrorCode.FileUploadingError)
 
-            db_file = File.from_file_create(FileCreate(file_path=full_path, comment=''))
+            with timed_phase('model'):
+                db_file = File.from_file_create(FileCreate(file_path=full_path, comment=''))
 
-            self._pg.add(db_file)
-            await self._pg.flush()
-            await self._pg.refresh(db_file)
+            with timed_phase('db'):
+                self._pg.add(db_file)
+                await self._pg.flush()
+                await self._pg.refresh(db_file)
+                await self._publish_change(FileChangeType.Created, db_file)
 
-        return db_file.to_public_file(self.base_dir)
+        with timed_phase('model'):
+            return db_file.to_public_file(self.base_dir)
 
     async def update_file(
             self,
@@ -114,12 +235,13 @@ class FilesService:
             file_id: str,
     ) -> FilePublic:
         async with self._pg.begin():
-            file_exists = await self._select_file_by_id(db=self._pg, file_id=file_id)
+            file_exists = await self._select_file_by_id(db=self._pg, file_id=file_id, for_update=True)
             if not file_exists:
                 raise EXC(ErrorCode.FileNotExists)
 
-            full_old_path = file_exists.get_full_path()
-            self._check_file(full_old_path)
+            full_old_path = file_exists.get_hot_path()
+            self._check_file(file_exists.get_full_path())
+            old_file = {'name': file_exists.name, 'path': file_exists.path}
 
             if update_obj.new_dir_path is None:
                 target_dir = file_exists.path
@@ -131,6 +253,7 @@ class FilesService:
             full_new_path = os.path.join(target_dir, new_file_name)
 
             changes = {}
+            old_copies = []
 
             if full_old_path != full_new_path:
                 file = await self._select_file_by_path(db=self._pg, file_path=full_new_path)
@@ -141,91 +264,632 @@ class FilesService:
 
                 self._make_directory(target_dir)
                 try:
-                    await asyncio.to_thread(shutil.move, full_old_path, full_new_path)
+                    with timed_phase('io'):
+                        await asyncio.to_thread(self._move_file_data, file_exists, full_new_path)
+                    # A moved file is restored to the hot tier at its new path
+                    changes['cold_path'] = None
+                    changes['compressed'] = False
                     p = Path(full_new_path)
                     changes['path'] = str(p.parent)
                     changes['name'] = p.stem
                 except:
                     raise EXC(ErrorCode.FileMoveError)
 
+                with timed_phase('db'):
+                    old_copies = await self._release_old_copies(file_exists)
+                if file_exists.cold_path is not None:
+                    old_copies.append(file_exists.cold_path)
+
             if update_obj.comment is not None and update_obj.comment != file_exists.comment:
                 changes['comment'] = update_obj.comment
 
             changes['updated_at'] = datetime.now()
 
-            file_exists.update(changes)
+            with timed_phase('model'):
+                file_exists.update(changes)
+
+            with timed_phase('db'):
+                self._pg.add(file_exists)
+                await self._pg.flush()
+                await self._pg.refresh(file_exists)
+                await self._publish_change(
+                    FileChangeType.Updated,
+                    file_exists,
+                    old_file if 'path' in changes else None,
+                )
 
-            self._pg.add(file_exists)
-            await self._pg.flush()
-            await self._pg.refresh(file_exists)
+        self._invalidate_cache(file_exists)
+        await self._remove_old_copies(old_copies)
 
+        with timed_phase('model'):
             return file_exists.to_public_file(self.base_dir)
 
     @classmethod
-    async def file_generator(cls, file_path: str, chunk_size: int) -> AsyncGenerator[bytes, None]:
+    def _move_file_data(cls, file: File, dst_path: str) -> None:
+        """Move a hot file, restore a cold one to `dst_path`; the cold copy is left for the caller to remove after commit."""
+        if file.cold_path is None:
+            shutil.move(file.get_hot_path(), dst_path)
+            return
+
+        copy_tier_data(file.cold_path, dst_path, decompress=file.compressed)
+
+    @classmethod
+    def _copy_file_data(cls, src_path: str, dst_path: str, decompress: bool = False) -> None:
+        """Copy file contents without passing the bytes through Python.
+
+        Tries a reflink clone first (instant, shares extents until modified), then `copy_file_range`,
+        which copies inside the kernel and falls back to sendfile-based `shutil.copyfileobj`.
+        Blocking, meant to be run in a thread.
+        """
+        if decompress:
+            with gzip.open(src_path, 'rb') as src, open(dst_path, 'xb') as dst:
+                shutil.copyfileobj(src, dst)
+            return
+
+        with open(src_path, 'rb') as src, open(dst_path, 'xb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return
+            except OSError:
+                pass
+
+            remaining = os.fstat(src.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return
+            except OSError:
+                # Not supported by the filesystem pair (e.g. EXDEV on older kernels): start over
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+
+            shutil.copyfileobj(src, dst)
+
+    async def copy_file(
+            self,
+            copy_obj: FileCopy,
+            file_id: str,
+    ) -> FilePublic:
+        target_dir = self._secure_path_join(self.base_dir, copy_obj.dir_path)
+
+        async with self._pg.begin():
+            source = await self._select_file_by_id(db=self._pg, file_id=file_id)
+            if not source:
+                raise EXC(ErrorCode.FileNotExists)
+
+            source_path = source.get_full_path()
+            self._check_file(source_path)
+
+            new_base_name = copy_obj.name.strip() if copy_obj.name else source.name
+            full_path = self._secure_path_join(target_dir, f'{new_base_name}{source.extension}')
+
+            file_exists = await self._select_file_by_path(db=self._pg, file_path=full_path)
+            if file_exists:
+                raise EXC(ErrorCode.FileAlreadyExists)
+
+            self._check_file(full_path, invert=True)
+
+            self._make_directory(target_dir)
+
+            try:
+                with timed_phase('io'):
+                    await asyncio.to_thread(self._copy_file_data, source_path, full_path, source.compressed)
+            except Exception as e:
+                self._logger.warning(f'{e}')
+                if not isinstance(e, FileExistsError):
+                    await asyncio.to_thread(self._remove_file, full_path)
+                raise EXC(ErrorCode.FileCopyError)
+
+            with timed_phase('model'):
+                db_file = File.from_file_create(FileCreate(file_path=full_path, comment=source.comment))
+
+            with timed_phase('db'):
+                self._pg.add(db_file)
+                await self._pg.flush()
+                await self._pg.refresh(db_file)
+                await self._publish_change(FileChangeType.Created, db_file)
+
+        with timed_phase('model'):
+            return db_file.to_public_file(self.base_dir)
+
+    @classmethod
+    def _remove_file(cls, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def _remove_old_copies(self, paths: list[str]) -> None:
+        with timed_phase('io'):
+            for path in paths:
+                await asyncio.to_thread(self._remove_file, path)
+
+    def _invalidate_cache(self, file: File) -> None:
+        if self._file_cache is not None:
+            self._file_cache.invalidate(str(file.id))
+
+    @classmethod
+    async def _bytes_generator(cls, data: bytes) -> AsyncGenerator[bytes, None]:
+        yield data
+
+    @classmethod
+    def _read_gzip_file(cls, file_path: str) -> bytes:
+        with gzip.open(file_path, 'rb') as f:
+            return f.read()
+
+    @classmethod
+    async def _read_file(cls, file_path: str, compressed: bool = False) -> bytes:
+        try:
+            with timed_phase('io'):
+                if compressed:
+                    return await asyncio.to_thread(cls._read_gzip_file, file_path)
+                async with aiofiles.open(file_path, mode='rb') as f:
+                    return await f.read()
+        except:
+            raise EXC(ErrorCode.FileDownloadingError)
+
+    @classmethod
+    async def file_generator(cls, f: Any, chunk_size: int) -> AsyncGenerator[bytes, None]:
+        """Stream an opened aiofiles file and close it."""
+        try:
+            try:
+                while True:
+                    with timed_phase('io'):
+                        chunk = await f.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                await f.close()
+        except:
+            raise EXC(ErrorCode.FileDownloadingError)
+
+    @classmethod
+    async def gzip_file_generator(cls, f: gzip.GzipFile, chunk_size: int) -> AsyncGenerator[bytes, None]:
+        """Stream an opened gzip file decompressed and close it, the blocking inflate runs in a thread."""
         try:
-            async with aiofiles.open(file_path, mode='rb') as f:
+            try:
                 while True:
-                    chunk = await f.read(chunk_size)
+                    with timed_phase('io'):
+                        chunk = await asyncio.to_thread(f.read, chunk_size)
                     if not chunk:
                         break
                     yield chunk
+            finally:
+                f.close()
         except:
             raise EXC(ErrorCode.FileDownloadingError)
 
+    async def _get_existing_file(self, file_id: str) -> File:
+        """Read-only lookup for downloads, coalesced with concurrent ones when a loader is set."""
+        if self._file_loader is not None:
+            try:
+                key = UUID(file_id)
+            except ValueError:
+                raise EXC(ErrorCode.FileNotExists)
+
+            with timed_phase('db'):
+                file_exists = await self._file_loader.load(key)
+        else:
+            async with self._pg.begin():
+                file_exists = await self._select_file_by_id(db=self._pg, file_id=file_id)
+
+        if not file_exists:
+            raise EXC(ErrorCode.FileNotExists)
+
+        return file_exists
+
+    @property
+    def offload_enabled(self) -> bool:
+        return self._offload is not None and self._offload.mode is not None
+
+    def _storage_dir(self, cold: bool = False) -> str:
+        if not cold:
+            return self.base_dir
+        if self._tiering is None:
+            raise EXC(ErrorCode.FileNotExists)
+        return self._tiering.conf.cold_dir
+
+    def _relative_path(self, full_path: str, cold: bool = False) -> str:
+        with timed_phase('path'):
+            return os.path.relpath(full_path, Path(self._storage_dir(cold)).resolve())
+
+    def _offload_headers(self, full_path: str) -> dict[str, str]:
+        self._check_file(full_path)
+        rel_path = self._relative_path(full_path)
+
+        if self._offload.mode == OffloadMode.XAccelRedirect:
+            location = f"{self._offload.internal_prefix.rstrip('/')}/{quote(rel_path)}"
+            return {'X-Accel-Redirect': location}
+
+        # Percent-encoded like the X-Accel-Redirect URI: header values are latin-1 and names are often not;
+        # mod_xsendfile decodes it (XSendFileUnescape, on by default)
+        root = self._offload.sendfile_root or str(Path(self.base_dir).resolve())
+        return {'X-Sendfile': quote(os.path.join(root, rel_path))}
+
+    def _record_access(self, file_id: Any) -> None:
+        if self._access_tracker is not None:
+            self._access_tracker.record(file_id)
+
+    async def _open_file(
+            self,
+            *,
+            cache_key: str,
+            version: Any,
+            size: int | None,
+            full_path: str,
+            chunk_size: int,
+            compressed: bool = False,
+    ) -> AsyncGenerator[bytes, None]:
+        cache = self._file_cache
+        if cache is not None and cache.accepts(size):
+            data = cache.get(cache_key, version)
+            if data is None:
+                self._check_file(full_path)
+                data = await self._read_file(full_path, compressed)
+                cache.put(cache_key, version, data)
+            self._record_access(cache_key)
+            return self._bytes_generator(data)
+
+        self._check_file(full_path)
+
+        # Opened before the response starts: the descriptor keeps the bytes readable even if
+        # the file is switched to another tier (and its old location removed) meanwhile
+        try:
+            with timed_phase('io'):
+                if compressed:
+                    f = await asyncio.to_thread(gzip.open, full_path, 'rb')
+                else:
+                    f = await aiofiles.open(full_path, mode='rb')
+        except FileNotFoundError:
+            raise EXC(ErrorCode.FileNotExists)
+        except OSError:
+            raise EXC(ErrorCode.FileDownloadingError)
+
+        self._record_access(cache_key)
+        if compressed:
+            return self.gzip_file_generator(f, chunk_size)
+        return self.file_generator(f, chunk_size)
+
+    async def get_file_offload(self, file_id: str) -> tuple[dict[str, str] | None, str]:
+        """Resolve a file for the front proxy: the X-Accel-Redirect / X-Sendfile header and the file name.
+
+        The headers are None for a file in cold storage, which the front proxy does not serve:
+        it has to be streamed with `get_file`.
+        """
+        file_exists = await self._get_existing_file(file_id)
+        headers = None
+        if file_exists.cold_path is None:
+            try:
+                headers = self._offload_headers(file_exists.get_full_path())
+            except EXC as e:
+                if e.error_code is not ErrorCode.FileNotExists:
+                    raise
+                # Switched to another tier (or moved) since the lookup
+                file_exists = await self._get_existing_file(file_id)
+                if file_exists.cold_path is None:
+                    headers = self._offload_headers(file_exists.get_full_path())
+
+        if headers is not None:
+            self._record_access(file_exists.id)
+        return headers, f'{file_exists.name}{file_exists.extension}'
+
+    async def _open_stored_file(self, file: File, chunk_size: int) -> AsyncGenerator[bytes, None]:
+        return await self._open_file(
+            cache_key=str(file.id),
+            version=file.updated_at,
+            size=file.size,
+            full_path=file.get_full_path(),
+            chunk_size=chunk_size,
+            compressed=file.compressed,
+        )
+
     async def get_file(
             self,
             file_id: str,
             chunk_size: int = 1024,
     ) -> tuple[AsyncGenerator[bytes, None], str]:
-        async with self._pg.begin():
-            file_exists = await self._select_file_by_id(db=self._pg, file_id=file_id)
-
-            if not file_exists:
+        file_exists = await self._get_existing_file(file_id)
+        try:
+            file_generator = await self._open_stored_file(file_exists, chunk_size)
+        except EXC as e:
+            if e.error_code is not ErrorCode.FileNotExists:
+                raise
+            # Switched to another tier (or moved) since the lookup: the row points at the current location
+            file_exists = await self._get_existing_file(file_id)
+            file_generator = await self._open_stored_file(file_exists, chunk_size)
+
+        # Only after the file is opened (or read into the cache): the promotion removes the cold copy
+        if file_exists.cold_path is not None and self._tiering is not None and self._tiering.conf.promote_on_access:
+            self._tiering.schedule_promotion(file_exists)
+
+        return file_generator, f'{file_exists.name}{file_exists.extension}'
+
+    async def issue_download_token(self, file_id: str, ttl: int | None = None) -> tuple[str, datetime]:
+        """Sign an expiring token with everything needed to serve the file without the database.
+
+        The token carries the storage path and name of the file and the size and mtime of its
+        bytes on disk, so it stops working once the file is moved, deleted or replaced by another
+        one at the same path. A switch between storage tiers keeps it valid (see `_verify_download_token`).
+        """
+        if self._signer is None:
+            raise EXC(ErrorCode.SignedUrlsDisabled)
+
+        file_exists = await self._get_existing_file(file_id)
+        full_path = file_exists.get_full_path()
+        st = self._stat_file(full_path)
+
+        ttl = min(ttl or self._signed_urls.default_ttl, self._signed_urls.max_ttl)
+        expires_at = datetime.now().astimezone() + timedelta(seconds=ttl)
+        payload = {
+            'i': str(file_exists.id),
+            'p': self._relative_path(full_path, cold=file_exists.cold_path is not None),
+            'n': f'{file_exists.name}{file_exists.extension}',
+            's': st.st_size,
+            'm': st.st_mtime_ns,
+            'v': file_exists.updated_at.isoformat() if file_exists.updated_at else None,
+        }
+        if file_exists.cold_path is not None:
+            payload['t'] = 1
+            payload['z'] = int(file_exists.compressed)
+
+        return self._signer.sign(payload, int(expires_at.timestamp())), expires_at
+
+    def _check_token_file(self, payload: dict[str, Any]) -> tuple[str, os.stat_result]:
+        # The path was resolved when the token was issued, it is re-checked against its storage dir anyway
+        full_path = self._secure_path_join(self._storage_dir(bool(payload.get('t'))), payload['p'])
+
+        st = self._stat_file(full_path)
+        if st.st_size != payload['s'] or st.st_mtime_ns != payload.get('m'):
+            raise EXC(ErrorCode.FileNotExists)
+        return full_path, st
+
+    async def _verify_download_token(self, token: str) -> tuple[dict[str, Any], str, os.stat_result]:
+        """Check the signature and that the file on disk is still the one the token was issued for.
+
+        A file no longer at the signed location is looked up by id once: while it is the same version
+        of the file, only switched to another storage tier, it is served from its current location.
+        """
+        if self._signer is None:
+            raise EXC(ErrorCode.SignedUrlsDisabled)
+
+        payload = self._signer.verify(token)
+        try:
+            full_path, st = self._check_token_file(payload)
+        except EXC as e:
+            if e.error_code is not ErrorCode.FileNotExists:
+                raise
+            file_exists = await self._get_existing_file(payload['i'])
+            version = file_exists.updated_at.isoformat() if file_exists.updated_at else None
+            if version != payload['v']:
                 raise EXC(ErrorCode.FileNotExists)
 
             full_path = file_exists.get_full_path()
-            self._check_file(full_path)
+            st = self._stat_file(full_path)
+            payload = {**payload, 't': int(file_exists.cold_path is not None), 'z': int(file_exists.compressed)}
+
+        return payload, full_path, st
+
+    async def get_signed_file_offload(self, token: str) -> tuple[dict[str, str] | None, str]:
+        """Same as `get_file_offload`: None headers for a file in cold storage."""
+        payload, full_path, _ = await self._verify_download_token(token)
+        if payload.get('t'):
+            return None, payload['n']
 
-        return self.file_generator(full_path, chunk_size), f'{file_exists.name}{file_exists.extension}'
+        headers = self._offload_headers(full_path)
+        self._record_access(payload['i'])
+
+        return headers, payload['n']
+
+    async def get_signed_file(
+            self,
+            token: str,
+            chunk_size: int = 1024,
+    ) -> tuple[AsyncGenerator[bytes, None], str]:
+        """Serve a file by a signed download token, without database access unless the file switched tiers."""
+        payload, full_path, st = await self._verify_download_token(token)
+        compressed = bool(payload.get('z'))
+
+        file_generator = await self._open_file(
+            cache_key=payload['i'],
+            version=datetime.fromisoformat(payload['v']) if payload['v'] else None,
+            # Size of the bytes on disk; unknown for a compressed file, which bypasses the cache then
+            size=None if compressed else st.st_size,
+            full_path=full_path,
+            chunk_size=chunk_size,
+            compressed=compressed,
+        )
+
+        return file_generator, payload['n']
 
     async def delete_file(self, file_id: str) -> FilePublic:
         async with self._pg.begin():
-            file_exists = await self._select_file_by_id(db=self._pg, file_id=file_id)
+            file_exists = await self._select_file_by_id(db=self._pg, file_id=file_id, for_update=True)
             if not file_exists:
                 raise EXC(ErrorCode.FileNotExists)
 
             full_path = file_exists.get_full_path()
             self._check_file(full_path)
 
-            await self._pg.delete(file_exists)
-            await self._pg.flush()
+            with timed_phase('db'):
+                old_copies = await self._release_old_copies(file_exists)
+                await self._pg.delete(file_exists)
+                await self._pg.flush()
+                await self._publish_change(FileChangeType.Deleted, file_exists)
 
-        await asyncio.to_thread(os.remove, full_path)
+        self._invalidate_cache(file_exists)
+        with timed_phase('io'):
+            await asyncio.to_thread(os.remove, full_path)
+        await self._remove_old_copies(old_copies)
 
-        return file_exists.to_public_file(self.base_dir)
+        with timed_phase('model'):
+            return file_exists.to_public_file(self.base_dir)
 
-    async def get_file_info(self, file_id: str) -> FilePublic:
-        async with self._pg.begin():
-            file_exists = await self._select_file_by_id(db=self._pg, file_id=file_id)
-            if not file_exists:
-                raise EXC(ErrorCode.FileNotExists)
+    @classmethod
+    async def _find_file(cls, db: AsyncSession, file_id: str) -> File | None:
+        async with db.begin():
+            return await cls._select_file_by_id(db=db, file_id=file_id)
 
-        return file_exists.to_public_file(self.base_dir)
+    async def get_file_info(self, file_id: str) -> FilePublic:
+        file_exists = await self._find_file(self._pg, file_id)
+        if not file_exists and self._primary_session is not None:
+            # The file may be too recent to have reached the replica
+            with timed_phase('db'):
+                primary = await self._primary_session()
+            file_exists = await self._find_file(primary, file_id)
+        if not file_exists:
+            raise EXC(ErrorCode.FileNotExists)
+
+        with timed_phase('model'):
+            return file_exists.to_public_file(self.base_dir)
 
     async def list_files(
             self,
             for_dir: str = None,
             skip: int = 0,
             limit: int = 10,
-    ) -> list[FilePublic]:
-        if for_dir is None:
-            stmt = select(File).order_by(File.id).offset(skip).limit(limit)
-        else:
+    ) -> list[dict[str, Any]]:
+        """Return FilePublic-shaped dicts built straight from the selected columns.
+
+        Skips ORM object and pydantic model construction per row, the result is meant
+        to be encoded as is with orjson (see the router).
+        """
+        limit = min(limit, self._list_max_limit)
+
+        stmt = select(*File.public_columns()).order_by(File.id).offset(skip).limit(limit)
+        if for_dir is not None:
             dir_path = self._secure_path_join(self.base_dir, for_dir)
-            stmt = select(File).order_by(File.id).where(File.path == dir_path).offset(skip).limit(limit)
+            stmt = stmt.where(File.path == dir_path)
 
+        async with self._pg.begin():
+            with timed_phase('db'):
+                result = await self._pg.exec(stmt)
+                rows = result.all()
+
+        with timed_phase('model'):
+            base_dir_prefix = str(Path(self.base_dir).resolve())
+            return [File.row_to_public_dict(row, base_dir_prefix) for row in rows]
+
+    async def export_files(
+            self,
+            path_prefix: str | None = None,
+            updated_since: datetime | None = None,
+            updated_until: datetime | None = None,
+    ) -> AsyncGenerator[bytes, None]:
+        """Stream metadata of all matching files as NDJSON, one FilePublic-shaped object per line.
+
+        Rows are fetched through a server-side cursor in batches of `export_batch_size`, so memory
+        does not depend on the catalog size. `updated_since` is inclusive, `updated_until` is exclusive.
+        """
+        stmt = select(*File.public_columns()).order_by(File.id)
+        if path_prefix is not None:
+            dir_path = self._secure_path_join(self.base_dir, path_prefix)
+            stmt = stmt.where(or_(File.path == dir_path, File.path.startswith(f'{dir_path}/', autoescape=True)))
+        if updated_since is not None:
+            stmt = stmt.where(File.updated_at >= updated_since)
+        if updated_until is not None:
+            stmt = stmt.where(File.updated_at < updated_until)
+
+        base_dir_prefix = str(Path(self.base_dir).resolve())
+
+        async def _generator() -> AsyncGenerator[bytes, None]:
+            async with self._pg.begin():
+                result = await self._pg.stream(stmt.execution_options(yield_per=self._export_batch_size))
+                async for rows in result.partitions():
+                    yield b''.join(
+                        orjson.dumps(File.row_to_public_dict(row, base_dir_prefix), option=orjson.OPT_APPEND_NEWLINE)
+                        for row in rows
+                    )
+
+        return _generator()
+
+    @classmethod
+    def _change_path_filter(cls, dir_path: str) -> Any:
+        nested = f'{dir_path}/'
+        return or_(
+            FileChange.path == dir_path,
+            FileChange.path.startswith(nested, autoescape=True),
+            FileChange.old_path == dir_path,
+            FileChange.old_path.startswith(nested, autoescape=True),
+        )
+
+    async def _change_log_bounds(self) -> tuple[int | None, int]:
+        """Oldest `seq` still in the log (None when it is empty) and the last one assigned (0 before the first)."""
+        sequence = cast(func.pg_get_serial_sequence(FileChange.__table__.fullname, 'seq'), REGCLASS)
+        stmt = select(
+            func.min(FileChange.seq),
+            func.coalesce(func.max(FileChange.seq), func.pg_sequence_last_value(sequence), 0),
+        )
         async with self._pg.begin():
             result = await self._pg.exec(stmt)
+            return tuple(result.one())
+
+    async def _select_changes(self, stmt: Any, after_seq: int) -> list[FileChange]:
+        async with self._pg.begin():
+            result = await self._pg.exec(stmt.where(FileChange.seq > after_seq))
+            return list(result.all())
+
+    @classmethod
+    def _format_changes(cls, changes: list[FileChange], base_dir_prefix: str) -> bytes:
+        return b''.join(
+            b'id: %d\nevent: %s\ndata: %s\n\n' % (
+                change.seq,
+                change.type.encode(),
+                orjson.dumps(change.to_public_dict(base_dir_prefix)),
+            )
+            for change in changes
+        )
+
+    async def stream_changes(
+            self,
+            since: int | None = None,
+            path_prefix: str | None = None,
+    ) -> AsyncGenerator[bytes, None]:
+        """Stream file changes with `seq` greater than `since` as server-sent events, then follow new ones.
+
+        Without `since` only changes made after subscribing are sent. When changes after `since`
+        have already been pruned from the log (or `since` is ahead of it), a `reset` event is sent
+        first and the stream follows new changes only: the client has to resync from scratch.
+        New changes are pushed on NOTIFY, a comment line is sent every `keepalive_seconds` of
+        silence to keep proxies from closing the connection.
+        """
+        stmt = select(FileChange).order_by(FileChange.seq).limit(self._change_feed.batch_size)
+        if path_prefix is not None:
+            dir_path = self._secure_path_join(self.base_dir, path_prefix)
+            stmt = stmt.where(self._change_path_filter(dir_path))
+
+        oldest, newest = await self._change_log_bounds()
+        # First seq the log can still deliver
+        floor = oldest if oldest is not None else newest + 1
+        reset = since is not None and not floor - 1 <= since <= newest
+        if since is None or reset:
+            since = newest
+
+        base_dir_prefix = str(Path(self.base_dir).resolve())
+
+        async def _generator() -> AsyncGenerator[bytes, None]:
+            last_seq = since
+            if reset:
+                yield b'id: %d\nevent: reset\ndata: %s\n\n' % (last_seq, orjson.dumps({'seq': last_seq}))
+
+            while True:
+                # Taken before the query: a NOTIFY arriving meanwhile still wakes us up
+                notified = self._next_change_event()
+
+                changes = await self._select_changes(stmt, last_seq)
+                if changes:
+                    last_seq = changes[-1].seq
+                    yield self._format_changes(changes, base_dir_prefix)
+                    if len(changes) == self._change_feed.batch_size:
+                        continue
+
+                try:
+                    await asyncio.wait_for(notified.wait(), timeout=self._change_feed.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
 
-        return [file.to_public_file(self.base_dir) for file in result]
+        return _generator()
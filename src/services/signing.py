@@ -0,0 +1,50 @@
+import base64
+import hashlib
+import hmac
+import time
+from typing import Any
+
+import orjson
+
+from src.base_async.base_module import EXC, ErrorCode
+
+
+class DownloadTokenSigner:
+    """HMAC-SHA256 signed, expiring tokens: `<base64url payload>.<base64url signature>`.
+
+    The payload is a compact JSON object, its `e` key holds the expiry as a unix timestamp.
+    """
+
+    def __init__(self, secret: str):
+        """."""
+        self._secret = secret.encode()
+
+    @classmethod
+    def _b64encode(cls, data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+    @classmethod
+    def _b64decode(cls, data: str) -> bytes:
+        return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+    def _signature(self, payload_b64: str) -> str:
+        return self._b64encode(hmac.new(self._secret, payload_b64.encode(), hashlib.sha256).digest())
+
+    def sign(self, payload: dict[str, Any], expires_at: int) -> str:
+        payload_b64 = self._b64encode(orjson.dumps({**payload, 'e': expires_at}))
+        return f'{payload_b64}.{self._signature(payload_b64)}'
+
+    def verify(self, token: str) -> dict[str, Any]:
+        payload_b64, _, signature = token.partition('.')
+        # Bytes: compare_digest raises TypeError on non-ASCII str, and the token comes straight from the URL
+        if not signature or not hmac.compare_digest(signature.encode(), self._signature(payload_b64).encode()):
+            raise EXC(ErrorCode.DownloadTokenInvalid)
+
+        try:
+            payload = orjson.loads(self._b64decode(payload_b64))
+        except ValueError:
+            raise EXC(ErrorCode.DownloadTokenInvalid)
+
+        if payload.get('e', 0) < time.time():
+            raise EXC(ErrorCode.DownloadTokenExpired)
+        return payload
@@ -0,0 +1,320 @@
+import asyncio
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager, suppress
+from datetime import datetime, timedelta
+import gzip
+from logging import getLogger
+import os
+from pathlib import Path
+import shutil
+from uuid import UUID, uuid4
+
+from sqlalchemy import bindparam, delete, func, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..config import TieringConfig
+from ..models import File, FileTierRemoval
+
+SessionScope = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+ConnectionScope = Callable[[], AbstractAsyncContextManager[AsyncConnection]]
+
+# Key of the session-level advisory lock that lets one process at a time run demotion passes ('FILETIER')
+TIERING_LOCK_KEY = 0x46494C4554494552
+
+
+def copy_tier_data(
+        src_path: str,
+        dst_path: str,
+        *,
+        decompress: bool = False,
+        compress: bool = False,
+) -> os.stat_result:
+    """Copy file bytes to another tier, (de)compressing on the way; the source is left in place.
+
+    The target is written under a unique temporary name and renamed into place, so a reader never
+    sees a partial file and concurrent copies do not write into each other. Returns the stat of
+    the written copy, see `remove_tier_copy`. Blocking, meant to be run in a thread.
+    """
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    tmp_path = f'{dst_path}.{uuid4().hex}.tmp'
+    try:
+        if decompress:
+            with gzip.open(src_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        elif compress:
+            with open(src_path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            shutil.copy2(src_path, tmp_path)
+        st = os.stat(tmp_path)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return st
+
+
+def remove_tier_data(path: str) -> None:
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def remove_tier_copy(path: str, st: os.stat_result) -> None:
+    """Remove the copy `copy_tier_data` returned `st` for, unless another copy has been written over it since."""
+    with suppress(FileNotFoundError):
+        current = os.stat(path)
+        if (current.st_dev, current.st_ino) == (st.st_dev, st.st_ino):
+            os.remove(path)
+
+
+class AccessTracker:
+    """Aggregates file downloads in memory and writes them in one batched UPDATE per flush."""
+
+    def __init__(self, session_scope: SessionScope):
+        """."""
+        self._session_scope = session_scope
+        self._accesses: dict[UUID, tuple[int, datetime]] = {}
+        self._logger = getLogger(__name__)
+
+    def record(self, file_id: UUID | str) -> None:
+        file_id = UUID(str(file_id))
+        count, _ = self._accesses.get(file_id, (0, None))
+        self._accesses[file_id] = (count + 1, datetime.now().astimezone())
+
+    async def flush(self) -> int:
+        accesses, self._accesses = self._accesses, {}
+        if not accesses:
+            return 0
+
+        table = File.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam('b_id'))
+            .values(
+                access_count=table.c.access_count + bindparam('b_count'),
+                last_accessed_at=func.greatest(table.c.last_accessed_at, bindparam('b_at')),
+            )
+        )
+        params = [{'b_id': file_id, 'b_count': count, 'b_at': at} for file_id, (count, at) in accesses.items()]
+
+        try:
+            async with self._session_scope() as session:
+                conn = await session.connection()
+                await conn.execute(stmt, params)
+        except Exception:
+            # Statistics are best effort: merge back so the next flush retries them
+            for file_id, (count, at) in accesses.items():
+                pending_count, pending_at = self._accesses.get(file_id, (0, at))
+                self._accesses[file_id] = (count + pending_count, max(at, pending_at))
+            raise
+
+        return len(params)
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                self._logger.warning('Ошибка записи статистики обращений к файлам', exc_info=True, extra={'e': e})
+
+
+class StorageTiering:
+    """Moves files nobody downloaded for `cold_after_days` to `cold_dir` and back.
+
+    `File.cold_path` points at the cold copy, so `File.get_full_path` keeps resolving the file.
+    A switch copies the bytes without any lock and commits under the row lock of the file, the same
+    lock `FilesService` takes to move or delete a file. The previous copy is kept for
+    `old_copy_grace_seconds` after the commit (a `FileTierRemoval` entry), downloads that resolved
+    the file before the switch keep reading it. Demotion passes run in one process at a time
+    (session-level advisory lock on a dedicated autocommit connection).
+    """
+
+    def __init__(
+            self,
+            base_dir: str,
+            conf: TieringConfig,
+            session_scope: SessionScope,
+            lock_connection: ConnectionScope,
+            old_copy_grace_seconds: float | None = None,
+    ):
+        """."""
+        self.base_dir = base_dir
+        self.conf = conf
+        self.old_copy_grace_seconds = (
+            conf.old_copy_grace_seconds if old_copy_grace_seconds is None else old_copy_grace_seconds
+        )
+        self._session_scope = session_scope
+        self._lock_connection = lock_connection
+        self._promotions: dict[UUID, asyncio.Task] = {}
+        self._logger = getLogger(__name__)
+
+    def cold_path_for(self, file: File) -> str:
+        rel_path = os.path.relpath(file.get_hot_path(), Path(self.base_dir).resolve())
+        cold_path = os.path.join(Path(self.conf.cold_dir).resolve(), rel_path)
+        return f'{cold_path}.gz' if self.conf.compress else cold_path
+
+    async def _select_candidates(self) -> list[File]:
+        last_used = func.coalesce(File.last_accessed_at, File.updated_at, File.created_at)
+        stmt = (
+            select(File)
+            .where(File.cold_path.is_(None), last_used < datetime.now().astimezone() - timedelta(days=self.conf.cold_after_days))
+            .order_by(last_used)
+            .limit(self.conf.batch_size)
+        )
+        async with self._session_scope() as session:
+            result = await session.exec(stmt)
+            return list(result)
+
+    @classmethod
+    def _is_unchanged(cls, current: File, read: File) -> bool:
+        return (current.cold_path, current.compressed, current.updated_at) == (
+            read.cold_path,
+            read.compressed,
+            read.updated_at,
+        )
+
+    async def _switch_tier(self, file_id: UUID, *, to_cold: bool) -> bool:
+        """Move the bytes of a file to the other tier; False if the file was skipped.
+
+        The copy is made without holding any lock, so changes of the file do not wait for it. The row
+        is then locked and the switch is committed only if the file has not changed since it was read
+        and a copy is still in place (a concurrent switch of the same file may have written over it
+        with the same bytes); otherwise the copy is dropped.
+        """
+        async with self._session_scope() as session:
+            file = await session.get(File, file_id)
+        if file is None or (file.cold_path is not None) == to_cold:
+            return False
+
+        src_path = file.get_full_path()
+        dst_path = self.cold_path_for(file) if to_cold else file.get_hot_path()
+        compressed = self.conf.compress if to_cold else False
+        copied = await asyncio.to_thread(
+            copy_tier_data,
+            src_path,
+            dst_path,
+            decompress=file.compressed,
+            compress=compressed,
+        )
+
+        async with self._session_scope() as session:
+            result = await session.exec(select(File).where(File.id == file_id).with_for_update())
+            current = result.one_or_none()
+            if (
+                current is None
+                or not self._is_unchanged(current, file)
+                # Purged under the row lock if it replaced an expired previous copy at the same path
+                or not await asyncio.to_thread(os.path.isfile, dst_path)
+            ):
+                # Under the row lock, so a switch that has not committed yet sees the copy gone;
+                # kept if a concurrent switch already committed the same path
+                if current is None or current.get_full_path() != dst_path:
+                    await asyncio.to_thread(remove_tier_copy, dst_path, copied)
+                return False
+
+            current.cold_path = dst_path if to_cold else None
+            current.compressed = compressed
+            session.add(current)
+            # A previous copy at the target path (switched back within its grace period) is now current
+            await session.exec(delete(FileTierRemoval).where(FileTierRemoval.path.in_([src_path, dst_path])))
+            session.add(FileTierRemoval(
+                path=src_path,
+                file_id=file_id,
+                remove_after=datetime.now().astimezone() + timedelta(seconds=self.old_copy_grace_seconds),
+            ))
+
+        return True
+
+    async def demote(self, file: File) -> bool:
+        return await self._switch_tier(file.id, to_cold=True)
+
+    async def promote(self, file: File) -> bool:
+        return await self._switch_tier(file.id, to_cold=False)
+
+    def schedule_promotion(self, file: File) -> None:
+        """Promote a cold file in the background, at most one promotion per file at a time."""
+        if file.id in self._promotions:
+            return
+
+        task = asyncio.create_task(self._promote_safely(file))
+        self._promotions[file.id] = task
+        task.add_done_callback(lambda _: self._promotions.pop(file.id, None))
+
+    async def _promote_safely(self, file: File) -> None:
+        try:
+            await self.promote(file)
+        except Exception as e:
+            self._logger.warning('Ошибка возврата файла из холодного хранилища', exc_info=True, extra={'e': e})
+
+    async def _purge_old_copy(self, entry: FileTierRemoval) -> bool:
+        async with self._session_scope() as session:
+            # The file row first, in the same order as a switch, which may make this path current again
+            result = await session.exec(select(File).where(File.id == entry.file_id).with_for_update())
+            file = result.one_or_none()
+            result = await session.exec(
+                delete(FileTierRemoval)
+                .where(FileTierRemoval.path == entry.path, FileTierRemoval.remove_after == entry.remove_after)
+                .returning(FileTierRemoval.path)
+            )
+            if result.one_or_none() is None:
+                return False
+            if file is None or file.get_full_path() != entry.path:
+                await asyncio.to_thread(remove_tier_data, entry.path)
+            return True
+
+    async def purge_old_copies(self) -> int:
+        """Remove copies left at previous locations whose grace period is over."""
+        stmt = (
+            select(FileTierRemoval)
+            .where(FileTierRemoval.remove_after < datetime.now().astimezone())
+            .order_by(FileTierRemoval.remove_after)
+            .limit(self.conf.batch_size)
+        )
+        async with self._session_scope() as session:
+            result = await session.exec(stmt)
+            entries = list(result)
+
+        removed = 0
+        for entry in entries:
+            try:
+                removed += await self._purge_old_copy(entry)
+            except Exception as e:
+                self._logger.warning('Ошибка удаления предыдущей копии файла', exc_info=True, extra={'e': e})
+        return removed
+
+    async def run_once(self) -> int:
+        """One demotion pass, skipped (0 files moved) while another process runs its own."""
+        async with self._lock_connection() as conn:
+            if not await conn.scalar(select(func.pg_try_advisory_lock(TIERING_LOCK_KEY))):
+                return 0
+
+            try:
+                moved = 0
+                for file in await self._select_candidates():
+                    try:
+                        moved += await self.demote(file)
+                    except Exception as e:
+                        self._logger.warning('Ошибка переноса файла в холодное хранилище', exc_info=True, extra={'e': e})
+                return moved
+            finally:
+                await conn.scalar(select(func.pg_advisory_unlock(TIERING_LOCK_KEY)))
+
+    async def run(self) -> None:
+        """Purge expired old copies and, with tiering enabled, run demotion passes every `interval_seconds`."""
+        while True:
+            try:
+                while await self.purge_old_copies() == self.conf.batch_size:
+                    pass
+            except Exception as e:
+                self._logger.warning('Ошибка удаления предыдущих копий файлов', exc_info=True, extra={'e': e})
+            if self.conf.enabled:
+                try:
+                    while await self.run_once() == self.conf.batch_size:
+                        pass
+                except Exception as e:
+                    self._logger.warning('Ошибка переноса файлов в холодное хранилище', exc_info=True, extra={'e': e})
+            await asyncio.sleep(self.conf.interval_seconds)
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from src.app import app
+from src.config import config
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(config, 'admin_token', 'secret')
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': 'wrong'}, {'X-Admin-Token': 'секрет'.encode()}])
+def test_forbidden(client, headers):
+    assert client.get('/admin/profiler', headers=headers).status_code == 403
+
+
+def test_allowed(client):
+    response = client.get('/admin/profiler', headers={'X-Admin-Token': 'secret'})
+
+    assert response.status_code == 200
+    assert response.json()['running'] is False
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from src.base_async.base_module import BatchLoader
+
+
+def make_loader(calls: list[list[int]], **kwargs) -> BatchLoader[int, str]:
+    async def batch_fn(keys: list[int]) -> dict[int, str]:
+        calls.append(keys)
+        await asyncio.sleep(0)
+        return {key: f'value-{key}' for key in keys if key >= 0}
+
+    return BatchLoader(batch_fn, **kwargs)
+
+
+def test_concurrent_loads_are_batched():
+    calls = []
+
+    async def main():
+        loader = make_loader(calls, window=0.01)
+        return await asyncio.gather(*(loader.load(key) for key in range(5)))
+
+    assert asyncio.run(main()) == [f'value-{key}' for key in range(5)]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_duplicate_keys_are_loaded_once():
+    calls = []
+
+    async def main():
+        loader = make_loader(calls)
+        results = await asyncio.gather(loader.load(1), loader.load(1), loader.load(2))
+        return results, loader.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == ['value-1', 'value-1', 'value-2']
+    assert calls == [[1, 2]]
+    assert stats['requests'] == 3
+    assert stats['keys_loaded'] == 2
+
+
+def test_in_flight_key_is_shared():
+    calls = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def batch_fn(keys: list[int]) -> dict[int, str]:
+            calls.append(keys)
+            await release.wait()
+            return {key: f'value-{key}' for key in keys}
+
+        loader = BatchLoader(batch_fn, window=0)
+        first = asyncio.create_task(loader.load(1))
+        while not calls:
+            await asyncio.sleep(0)
+        # The batch of the first load is running now: the second one joins it
+        second = asyncio.create_task(loader.load(1))
+        await asyncio.sleep(0)
+        release.set()
+        return await first, await second
+
+    assert asyncio.run(main()) == ('value-1', 'value-1')
+    assert calls == [[1]]
+
+
+def test_max_batch_size_dispatches_early():
+    calls = []
+
+    async def main():
+        loader = make_loader(calls, max_batch_size=2, window=10)
+        return await asyncio.wait_for(asyncio.gather(*(loader.load(key) for key in range(4))), timeout=1)
+
+    assert asyncio.run(main()) == [f'value-{key}' for key in range(4)]
+    assert calls == [[0, 1], [2, 3]]
+
+
+def test_missing_key_resolves_to_none():
+    calls = []
+
+    async def main():
+        return await make_loader(calls).load(-1)
+
+    assert asyncio.run(main()) is None
+
+
+def test_batch_error_reaches_every_waiter():
+    async def batch_fn(keys: list[int]) -> dict[int, str]:
+        raise RuntimeError('db is down')
+
+    async def main():
+        loader = BatchLoader(batch_fn)
+        return await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    calls = []
+
+    async def main():
+        loader = make_loader(calls, window=0.01)
+        cancelled = asyncio.create_task(loader.load(1))
+        other = asyncio.create_task(loader.load(1))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await other
+
+    assert asyncio.run(main()) == 'value-1'
+
+
+def test_cancelled_batch_releases_waiters():
+    async def main():
+        started = asyncio.Event()
+
+        async def batch_fn(keys: list[int]) -> dict[int, str]:
+            started.set()
+            await asyncio.Event().wait()
+            return {}
+
+        loader = BatchLoader(batch_fn, window=0)
+        waiters = [asyncio.create_task(loader.load(key)) for key in (1, 2)]
+        await started.wait()
+        for task in loader._tasks:
+            task.cancel()
+        return await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), timeout=1)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,205 @@
+import asyncio
+from datetime import datetime
+import re
+from typing import Any
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+import orjson
+import pytest
+from sqlalchemy.sql import operators
+
+from src.app import app
+from src.config import ChangeFeedConfig
+from src.injectors.services import files_service
+from src.models import FileChange, FileChangeType
+from src.services import FilesService
+
+BASE_DIR = '/storage'
+
+
+def make_change(seq: int, path: str = BASE_DIR, **kwargs) -> FileChange:
+    return FileChange(
+        seq=seq,
+        file_id=uuid4(),
+        type=FileChangeType.Created.value,
+        name=f'f{seq}',
+        extension='.txt',
+        path=path,
+        created_at=datetime(2025, 1, 2, 3, 4, 5),
+        **kwargs,
+    )
+
+
+def make_service(log: list[FileChange], batch_size: int = 500) -> FilesService:
+    """FilesService over an in-memory change log, `log` is ordered by seq."""
+    service = FilesService(
+        base_dir=BASE_DIR,
+        upload_chunk_size=1024,
+        pg=None,
+        change_feed=ChangeFeedConfig(batch_size=batch_size, keepalive_seconds=0),
+        next_change_event=asyncio.Event,
+    )
+
+    async def change_log_bounds() -> tuple[int | None, int]:
+        return (log[0].seq, log[-1].seq) if log else (None, 0)
+
+    async def select_changes(_stmt: Any, after_seq: int) -> list[FileChange]:
+        return [change for change in log if change.seq > after_seq][:batch_size]
+
+    service._change_log_bounds = change_log_bounds
+    service._select_changes = select_changes
+    return service
+
+
+def read_events(service: FilesService, since: int | None, count: int) -> list[bytes]:
+    async def main():
+        generator = await service.stream_changes(since=since)
+        chunks = []
+        async for chunk in generator:
+            chunks.append(chunk)
+            if len(chunks) == count:
+                break
+        await generator.aclose()
+        return chunks
+
+    return asyncio.run(main())
+
+
+def test_changes_are_framed_as_server_sent_events():
+    change = make_change(7, path=f'{BASE_DIR}/docs')
+
+    [chunk, keepalive] = read_events(make_service([change]), since=6, count=2)
+
+    data = orjson.dumps({
+        'seq': 7,
+        'type': 'created',
+        'file_id': str(change.file_id),
+        'name': 'f7',
+        'extension': '.txt',
+        'path': '/docs',
+        'old_name': None,
+        'old_path': None,
+        'created_at': '2025-01-02 03:04:05',
+    })
+    assert chunk == b'id: 7\nevent: created\ndata: ' + data + b'\n\n'
+    assert keepalive == b': keepalive\n\n'
+
+
+def test_full_batches_are_sent_back_to_back():
+    log = [make_change(seq) for seq in range(1, 6)]
+
+    chunks = read_events(make_service(log, batch_size=2), since=0, count=3)
+
+    assert [re.findall(rb'^id: (\d+)$', chunk, re.MULTILINE) for chunk in chunks] == [
+        [b'1', b'2'],
+        [b'3', b'4'],
+        [b'5'],
+    ]
+
+
+def test_without_since_only_new_changes_are_sent():
+    assert read_events(make_service([make_change(1), make_change(2)]), since=None, count=1) == [b': keepalive\n\n']
+
+
+@pytest.mark.parametrize('since', [9, 10, 12])
+def test_resume_within_the_log(since):
+    log = [make_change(seq) for seq in (10, 11, 12)]
+
+    [chunk] = read_events(make_service(log), since=since, count=1)
+
+    assert b'event: reset' not in chunk
+
+
+@pytest.mark.parametrize(('since', 'log_seqs'), [(3, (10, 11)), (20, (10, 11)), (5, ())])
+def test_resume_outside_the_log_sends_reset(since, log_seqs):
+    log = [make_change(seq) for seq in log_seqs]
+    head = log_seqs[-1] if log_seqs else 0
+
+    [reset, after] = read_events(make_service(log), since=since, count=2)
+
+    assert reset == b'id: %d\nevent: reset\ndata: {"seq":%d}\n\n' % (head, head)
+    # Only changes made after the reset follow
+    assert after == b': keepalive\n\n'
+
+
+def like_prefix(pattern: str, escape: str) -> re.Pattern:
+    """Regex equivalent of `LIKE pattern || '%'`."""
+    out, chars = [], iter(pattern)
+    for char in chars:
+        if char == escape:
+            out.append(re.escape(next(chars)))
+        elif char == '%':
+            out.append('.*')
+        elif char == '_':
+            out.append('.')
+        else:
+            out.append(re.escape(char))
+    return re.compile(''.join(out) + '.*', re.DOTALL)
+
+
+def matches_path_filter(dir_path: str, change: FileChange) -> bool:
+    for clause in FilesService._change_path_filter(dir_path).clauses:
+        value = getattr(change, clause.left.key)
+        if value is None:
+            continue
+        if clause.operator is operators.eq:
+            hit = value == clause.right.value
+        else:
+            hit = like_prefix(clause.right.value, clause.modifiers['escape']).fullmatch(value) is not None
+        if hit:
+            return True
+    return False
+
+
+@pytest.mark.parametrize(('path', 'old_path', 'expected'), [
+    ('/storage/a_b%', None, True),
+    ('/storage/a_b%/nested/deeper', None, True),
+    ('/storage/other', '/storage/a_b%/nested', True),
+    ('/storage/a_b%c', None, False),
+    ('/storage/aXb%/nested', None, False),
+    ('/storage/a_bXX/nested', None, False),
+    ('/storage', None, False),
+])
+def test_path_prefix_filter(path, old_path, expected):
+    change = make_change(1, path=path, old_path=old_path)
+
+    assert matches_path_filter('/storage/a_b%', change) is expected
+
+
+class RecordingFeedService:
+    """Records the `since` a change stream was requested with."""
+
+    def __init__(self):
+        """."""
+        self.calls: list[tuple[int | None, str | None]] = []
+
+    async def stream_changes(self, since: int | None = None, path_prefix: str | None = None) -> Any:
+        self.calls.append((since, path_prefix))
+
+        async def _generator():
+            yield b': keepalive\n\n'
+
+        return _generator()
+
+
+@pytest.fixture
+def feed_service():
+    service = RecordingFeedService()
+    app.dependency_overrides[files_service] = lambda: service
+    yield service
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize(('query', 'headers', 'expected'), [
+    ({}, {}, None),
+    ({'since': 5}, {}, 5),
+    ({}, {'Last-Event-ID': '7'}, 7),
+    ({'since': 5}, {'Last-Event-ID': '7'}, 7),
+])
+def test_last_event_id_takes_precedence(feed_service, query, headers, expected):
+    response = TestClient(app).get('/api/files/changes', params={**query, 'path_prefix': 'docs'}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/event-stream')
+    assert feed_service.calls == [(expected, 'docs')]
@@ -0,0 +1,141 @@
+from datetime import datetime
+import gzip
+from pathlib import Path
+from urllib.parse import quote
+from uuid import UUID, uuid4
+
+from fastapi.testclient import TestClient
+import pytest
+
+from src.app import app
+from src.base_async.base_module import BatchLoader
+from src.config import DownloadOffloadConfig, OffloadMode
+from src.injectors.services import files_storage_service
+from src.models import File
+from src.services import FilesService
+
+
+@pytest.fixture
+def storage(tmp_path: Path) -> Path:
+    base_dir = tmp_path / 'storage'
+    base_dir.mkdir()
+    return base_dir
+
+
+@pytest.fixture
+def files() -> dict[UUID, File]:
+    return {}
+
+
+def add_file(files: dict[UUID, File], directory: Path, filename: str, data: bytes, **kwargs) -> File:
+    directory.mkdir(parents=True, exist_ok=True)
+    path = Path(filename)
+    file = File(
+        id=uuid4(),
+        name=path.stem,
+        extension=path.suffix,
+        path=str(directory.resolve()),
+        size=len(data),
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        **kwargs,
+    )
+    (directory / filename).write_bytes(data)
+    files[file.id] = file
+    return file
+
+
+def make_client(storage: Path, files: dict[UUID, File], offload: DownloadOffloadConfig) -> TestClient:
+    async def load_files(file_ids: list[UUID]) -> dict[UUID, File]:
+        return {file_id: files[file_id] for file_id in file_ids if file_id in files}
+
+    service = FilesService(
+        base_dir=str(storage),
+        upload_chunk_size=1024,
+        pg=None,
+        offload=offload,
+        file_loader=BatchLoader(load_files),
+    )
+    app.dependency_overrides[files_storage_service] = lambda: service
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_overrides():
+    yield
+    app.dependency_overrides.clear()
+
+
+def test_x_accel_redirect(storage, files):
+    file = add_file(files, storage / 'docs', 'report.pdf', b'data')
+    client = make_client(storage, files, DownloadOffloadConfig(mode=OffloadMode.XAccelRedirect))
+
+    response = client.get(f'/api/files/{file.id}/download')
+
+    assert response.status_code == 200
+    assert response.headers['x-accel-redirect'] == '/protected_files/docs/report.pdf'
+    assert response.headers['content-disposition'] == "attachment; filename*=UTF-8''report.pdf"
+    assert response.content == b''
+
+
+def test_x_accel_redirect_non_ascii_name(storage, files):
+    file = add_file(files, storage / 'отчёты', 'отчёт 2025.pdf', b'data')
+    client = make_client(storage, files, DownloadOffloadConfig(mode=OffloadMode.XAccelRedirect))
+
+    response = client.get(f'/api/files/{file.id}/download')
+
+    assert response.status_code == 200
+    assert response.headers['x-accel-redirect'] == f"/protected_files/{quote('отчёты/отчёт 2025.pdf')}"
+    assert response.headers['content-disposition'] == f"attachment; filename*=UTF-8''{quote('отчёт 2025.pdf', safe='')}"
+
+
+def test_x_sendfile(storage, files):
+    file = add_file(files, storage / 'docs', 'report.pdf', b'data')
+    offload = DownloadOffloadConfig(mode=OffloadMode.XSendfile, sendfile_root='/srv/files')
+    client = make_client(storage, files, offload)
+
+    response = client.get(f'/api/files/{file.id}/download')
+
+    assert response.status_code == 200
+    assert response.headers['x-sendfile'] == '/srv/files/docs/report.pdf'
+    assert response.content == b''
+
+
+def test_x_sendfile_non_ascii_name(storage, files):
+    file = add_file(files, storage / 'отчёты', 'отчёт.pdf', b'data')
+    client = make_client(storage, files, DownloadOffloadConfig(mode=OffloadMode.XSendfile))
+
+    response = client.get(f'/api/files/{file.id}/download')
+
+    assert response.status_code == 200
+    assert response.headers['x-sendfile'] == quote(f'{storage.resolve()}/отчёты/отчёт.pdf')
+
+
+@pytest.mark.parametrize('mode', [OffloadMode.XAccelRedirect, OffloadMode.XSendfile])
+def test_cold_file_is_streamed(tmp_path, storage, files, mode):
+    data = b'cold data' * 100
+    cold_dir = tmp_path / 'cold' / 'docs'
+    file = add_file(files, storage / 'docs', 'report.pdf', b'')
+    (storage / 'docs' / 'report.pdf').unlink()
+    cold_dir.mkdir(parents=True)
+    (cold_dir / 'report.pdf.gz').write_bytes(gzip.compress(data))
+    file.cold_path = str(cold_dir / 'report.pdf.gz')
+    file.compressed = True
+    client = make_client(storage, files, DownloadOffloadConfig(mode=mode))
+
+    response = client.get(f'/api/files/{file.id}/download')
+
+    assert response.status_code == 200
+    assert 'x-accel-redirect' not in response.headers
+    assert 'x-sendfile' not in response.headers
+    assert response.content == data
+
+
+@pytest.mark.parametrize('mode', [OffloadMode.XAccelRedirect, OffloadMode.XSendfile])
+def test_missing_file(storage, files, mode):
+    file = add_file(files, storage / 'docs', 'report.pdf', b'data')
+    (storage / 'docs' / 'report.pdf').unlink()
+    client = make_client(storage, files, DownloadOffloadConfig(mode=mode))
+
+    assert client.get(f'/api/files/{file.id}/download').status_code == 404
+    assert client.get(f'/api/files/{uuid4()}/download').status_code == 404
@@ -0,0 +1,64 @@
+from src.services.file_cache import FileContentCache
+
+
+def test_hit_and_miss():
+    cache = FileContentCache(max_bytes=100, max_item_size=10)
+    cache.put('a', 1, b'data')
+
+    assert cache.get('a', 1) == b'data'
+    assert cache.get('b', 1) is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_stale_version_is_not_served():
+    cache = FileContentCache(max_bytes=100, max_item_size=10)
+    cache.put('a', 1, b'old')
+
+    assert cache.get('a', 2) is None
+
+    cache.put('a', 2, b'new')
+    assert cache.get('a', 2) == b'new'
+    assert cache.stats()['bytes'] == 3
+
+
+def test_large_items_are_not_accepted():
+    cache = FileContentCache(max_bytes=100, max_item_size=10)
+
+    assert cache.accepts(10)
+    assert not cache.accepts(11)
+    assert not cache.accepts(None)
+
+    cache.put('a', 1, b'x' * 11)
+    assert cache.get('a', 1) is None
+
+
+def test_least_recently_used_is_evicted():
+    cache = FileContentCache(max_bytes=10, max_item_size=5)
+    cache.put('a', 1, b'aaaa')
+    cache.put('b', 1, b'bbbb')
+    cache.get('a', 1)
+    cache.put('c', 1, b'cccc')
+
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == b'aaaa'
+    assert cache.get('c', 1) == b'cccc'
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] == 8
+
+
+def test_invalidate():
+    cache = FileContentCache(max_bytes=100, max_item_size=10)
+    cache.put('a', 1, b'data')
+    cache.invalidate('a')
+    cache.invalidate('missing')
+
+    assert cache.get('a', 1) is None
+    assert cache.stats()['bytes'] == 0
+
+
+def test_disabled():
+    cache = FileContentCache(max_bytes=0, max_item_size=10)
+
+    assert not cache.enabled
+    assert not cache.accepts(1)
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from src.models import File
+
+BASE_DIR = 'storage'
+
+
+@pytest.mark.parametrize(('created_at', 'updated_at'), [
+    (None, None),
+    (datetime(2025, 6, 30, 16, 13, 47, 123456), None),
+    (datetime(2025, 6, 30, 16, 13, 47, tzinfo=timezone.utc), datetime(2025, 7, 1, 9, 0, 5, 999999)),
+    (
+        datetime(2025, 6, 30, 16, 13, 47, 500000, tzinfo=timezone(timedelta(hours=3))),
+        datetime(2025, 12, 31, 23, 59, 59, tzinfo=timezone(timedelta(hours=-5, minutes=-30))),
+    ),
+])
+def test_row_to_public_dict_matches_public_file(created_at, updated_at):
+    base_dir_prefix = str(Path(BASE_DIR).resolve())
+    file = File(
+        id=uuid4(),
+        name='report',
+        extension='.pdf',
+        path=f'{base_dir_prefix}/docs/2025',
+        size=1024,
+        created_at=created_at,
+        updated_at=updated_at,
+        comment=None,
+    )
+    row = tuple(getattr(file, column.key) for column in File.public_columns())
+
+    public = File.row_to_public_dict(row, base_dir_prefix)
+
+    assert public == file.to_public_file(BASE_DIR).model_dump()
+    assert public['path'] == '/docs/2025'
+    # format_time replaced strftime and must keep its output for naive and tz-aware values
+    assert (public['created_at'], public['updated_at']) == tuple(
+        dt.strftime('%Y-%m-%d %H:%M:%S') if dt is not None else None for dt in (created_at, updated_at)
+    )
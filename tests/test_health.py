@@ -0,0 +1,80 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from src.app import app
+from src.config import config
+from src.injectors import connections
+
+
+class FakePg:
+    """Primary connection stub with a fixed state."""
+
+    def __init__(self, is_ready: bool, alive: bool, replicas: dict[str, bool] | None = None):
+        """."""
+        self.is_ready = is_ready
+        self.alive = alive
+        self.replicas = replicas or {}
+
+    async def ping(self) -> bool:
+        return self.alive
+
+    def replica_states(self) -> dict[str, bool]:
+        return self.replicas
+
+
+@pytest.fixture
+def storage_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'storage_dir', str(tmp_path))
+    return tmp_path
+
+
+def get_readyz(monkeypatch, pg: FakePg) -> tuple[int, dict]:
+    monkeypatch.setattr(connections, 'pg', pg)
+    response = TestClient(app).get('/readyz')
+    return response.status_code, response.json()
+
+
+def test_healthz():
+    response = TestClient(app).get('/healthz')
+
+    assert response.status_code == 200
+    assert response.json() == {'status': 'ok'}
+
+
+@pytest.mark.usefixtures('storage_dir')
+def test_readyz_ready(monkeypatch):
+    pg = FakePg(is_ready=True, alive=True, replicas={'replica:5432': False})
+
+    assert get_readyz(monkeypatch, pg) == (200, {
+        'status': 'ready',
+        'checks': {'db': True, 'storage': True},
+        # A replica that is down does not affect readiness
+        'replicas': {'replica:5432': False},
+    })
+
+
+@pytest.mark.usefixtures('storage_dir')
+def test_readyz_starting(monkeypatch):
+    assert get_readyz(monkeypatch, FakePg(is_ready=False, alive=False)) == (503, {
+        'status': 'starting',
+        'checks': {'db': False, 'storage': True},
+    })
+
+
+@pytest.mark.usefixtures('storage_dir')
+def test_readyz_database_unavailable(monkeypatch):
+    assert get_readyz(monkeypatch, FakePg(is_ready=True, alive=False)) == (503, {
+        'status': 'unavailable',
+        'checks': {'db': False, 'storage': True},
+        'replicas': {},
+    })
+
+
+def test_readyz_storage_unavailable(monkeypatch, storage_dir):
+    monkeypatch.setattr(config, 'storage_dir', str(storage_dir / 'missing'))
+
+    assert get_readyz(monkeypatch, FakePg(is_ready=True, alive=True)) == (503, {
+        'status': 'unavailable',
+        'checks': {'db': True, 'storage': False},
+        'replicas': {},
+    })
@@ -0,0 +1,153 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any
+
+import orjson
+import pytest
+from sqlalchemy.engine.url import make_url
+
+from src.base_async.base_module import EXC, ErrorCode, PgConfig
+from src.base_async.injectors.pg import AsyncPgConnectionInj, PgReplica
+from src.models import File
+from src.services import FilesService
+
+PRIMARY = 'primary'
+
+
+def make_pg(replica_count: int) -> tuple[AsyncPgConnectionInj, list[str]]:
+    conf = PgConfig(host='primary', port=5432, user='u', password='p', database='db', replica_retry_timeout=10)
+    pg = AsyncPgConnectionInj(conf=conf)
+    pg._pg = PRIMARY
+    pg._replicas = [
+        PgReplica(url=make_url(f'postgresql+asyncpg://u:p@replica{i}:5432/db'), engine=None, pg=f'replica{i}')
+        for i in range(replica_count)
+    ]
+    opened = []
+
+    async def _open_session(session_registry: str, _role: str) -> str:
+        if session_registry.startswith('broken'):
+            raise ConnectionError(session_registry)
+        opened.append(session_registry)
+        return session_registry
+
+    async def acquire_session() -> str:
+        opened.append(PRIMARY)
+        return PRIMARY
+
+    pg._open_session = _open_session
+    pg.acquire_session = acquire_session
+    return pg, opened
+
+
+def test_replicas_are_used_round_robin():
+    pg, opened = make_pg(2)
+
+    async def main():
+        return [await pg.acquire_read_session() for _ in range(4)]
+
+    assert asyncio.run(main()) == ['replica0', 'replica1', 'replica0', 'replica1']
+    assert opened == ['replica0', 'replica1', 'replica0', 'replica1']
+
+
+def test_failed_replica_is_marked_down_and_skipped():
+    pg, _ = make_pg(2)
+    pg._replicas[0].pg = 'broken0'
+
+    async def main():
+        return [await pg.acquire_read_session() for _ in range(3)]
+
+    assert asyncio.run(main()) == ['replica1', 'replica1', 'replica1']
+    assert not pg._replicas[0].is_available
+    assert pg.replica_states() == {'replica0:5432': False, 'replica1:5432': True}
+
+
+def test_marked_up_replica_is_used_again():
+    pg, _ = make_pg(1)
+    pg._replicas[0].mark_down(10)
+
+    async def main():
+        first = await pg.acquire_read_session()
+        pg._replicas[0].mark_up()
+        return first, await pg.acquire_read_session()
+
+    assert asyncio.run(main()) == (PRIMARY, 'replica0')
+
+
+@pytest.mark.parametrize('replica_count', [0, 2])
+def test_falls_back_to_primary(replica_count):
+    pg, _ = make_pg(replica_count)
+    for replica in pg._replicas:
+        replica.pg = f'broken-{replica.name}'
+
+    assert asyncio.run(pg.acquire_read_session()) == PRIMARY
+    assert all(not replica.is_available for replica in pg._replicas)
+
+
+class FakeSession:
+    """Session stub holding the files it can find."""
+
+    def __init__(self, files: dict[str, File]):
+        """."""
+        self.files = files
+        self.lookups = 0
+
+    @asynccontextmanager
+    async def begin(self) -> Any:
+        yield
+
+
+@pytest.fixture
+def select_from_fake_session(monkeypatch):
+    async def _select_file_by_id(*, db: FakeSession, file_id: str, **_kwargs: Any) -> File | None:
+        db.lookups += 1
+        return db.files.get(file_id)
+
+    monkeypatch.setattr(FilesService, '_select_file_by_id', _select_file_by_id)
+
+
+def make_files_service(replica: FakeSession, primary: FakeSession | None) -> FilesService:
+    async def primary_session() -> FakeSession:
+        return primary
+
+    return FilesService(
+        base_dir='storage',
+        upload_chunk_size=1024,
+        pg=replica,
+        primary_session=primary_session if primary is not None else None,
+    )
+
+
+def make_file() -> File:
+    return File(name='a', extension='.txt', path='storage', size=1)
+
+
+@pytest.mark.usefixtures('select_from_fake_session')
+def test_file_info_found_on_replica_skips_primary():
+    file = make_file()
+    replica, primary = FakeSession({'id': file}), FakeSession({'id': file})
+
+    info = asyncio.run(make_files_service(replica, primary).get_file_info('id'))
+
+    assert info.name == 'a'
+    assert (replica.lookups, primary.lookups) == (1, 0)
+
+
+@pytest.mark.usefixtures('select_from_fake_session')
+def test_file_info_missing_on_replica_is_read_from_primary():
+    replica, primary = FakeSession({}), FakeSession({'id': make_file()})
+
+    info = asyncio.run(make_files_service(replica, primary).get_file_info('id'))
+
+    assert info.name == 'a'
+    assert (replica.lookups, primary.lookups) == (1, 1)
+
+
+@pytest.mark.usefixtures('select_from_fake_session')
+@pytest.mark.parametrize('with_primary', [True, False])
+def test_file_info_missing_everywhere(with_primary):
+    replica = FakeSession({})
+
+    with pytest.raises(EXC) as exc_info:
+        asyncio.run(make_files_service(replica, FakeSession({}) if with_primary else None).get_file_info('id'))
+
+    assert orjson.loads(exc_info.value.detail)['code'] == ErrorCode.FileNotExists.value.code
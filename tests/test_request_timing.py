@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.base_async.base_module import RequestTimingMiddleware, SlowRequestLog, timed_phase
+
+
+def make_app(slow_requests: SlowRequestLog) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware, slow_requests=slow_requests)
+
+    @app.get('/slow')
+    async def slow() -> dict[str, bool]:
+        with timed_phase('db'):
+            await asyncio.sleep(0.05)
+        return {'ok': True}
+
+    @app.get('/stream')
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            # Like an event stream waiting for its first event
+            with timed_phase('io'):
+                await asyncio.sleep(0.1)
+            yield b'first'
+            yield b'second'
+
+        return StreamingResponse(chunks())
+
+    return app
+
+
+def test_slow_request_is_logged_with_phases():
+    slow_requests = SlowRequestLog(threshold_ms=20)
+
+    TestClient(make_app(slow_requests)).get('/slow')
+
+    [entry] = slow_requests.entries()
+    assert entry['path'] == '/slow'
+    assert entry['status'] == 200
+    assert entry['phases']['db'] >= 50
+
+
+def test_streaming_is_timed_until_response_start():
+    slow_requests = SlowRequestLog(threshold_ms=50)
+
+    started = time.perf_counter()
+    response = TestClient(make_app(slow_requests)).get('/stream')
+
+    assert response.content == b'firstsecond'
+    assert time.perf_counter() - started >= 0.1
+    assert slow_requests.entries() == []
@@ -0,0 +1,50 @@
+from typing import Any
+
+from fastapi.testclient import TestClient
+import pytest
+
+from src.app import app
+from src.injectors.services import files_service
+from src.models import FilePublic
+
+
+class RecordingFilesService:
+    """Records which FilesService operation a request was routed to."""
+
+    def __init__(self):
+        """."""
+        self.calls: list[tuple[str, Any]] = []
+
+    def _public(self) -> FilePublic:
+        return FilePublic(id='id', name='a', extension='.txt', path='', size=1, created_at=None, updated_at=None, comment='')
+
+    async def add_file(self, dir_path: str, _file: Any) -> FilePublic:
+        self.calls.append(('add_file', dir_path))
+        return self._public()
+
+    async def copy_file(self, _copy: Any, file_id: str) -> FilePublic:
+        self.calls.append(('copy_file', file_id))
+        return self._public()
+
+
+@pytest.fixture
+def service():
+    service = RecordingFilesService()
+    app.dependency_overrides[files_service] = lambda: service
+    yield service
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize('dir_path', ['reports', 'reports/copy', 'reports/signed-url', 'copy'])
+def test_upload_into_any_folder(service, dir_path):
+    response = TestClient(app).post(f'/api/files/{dir_path}', files={'input_file': ('a.txt', b'x')})
+
+    assert response.status_code == 200
+    assert service.calls == [('add_file', dir_path)]
+
+
+def test_copy_action(service):
+    response = TestClient(app).post('/api/files/some-id:copy', json={'dir_path': 'copies'})
+
+    assert response.status_code == 200
+    assert service.calls == [('copy_file', 'some-id')]
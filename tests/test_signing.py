@@ -0,0 +1,66 @@
+import time
+
+import orjson
+import pytest
+
+from src.base_async.base_module import EXC, ErrorCode
+from src.services.signing import DownloadTokenSigner
+
+
+def error_code(exc_info: pytest.ExceptionInfo[EXC]) -> int:
+    return orjson.loads(exc_info.value.detail)['code']
+
+
+def test_round_trip():
+    signer = DownloadTokenSigner('secret')
+    token = signer.sign({'i': 'id', 'n': 'отчёт.pdf'}, int(time.time()) + 60)
+
+    payload = signer.verify(token)
+
+    assert payload['i'] == 'id'
+    assert payload['n'] == 'отчёт.pdf'
+
+
+def test_token_is_url_safe():
+    token = DownloadTokenSigner('secret').sign({'p': 'a/b?c=d&e'}, int(time.time()) + 60)
+
+    assert token.isascii()
+    assert not set(token) & set('/+=?&')
+
+
+@pytest.mark.parametrize('token', ['', 'payload', 'payload.', '.signature', 'é.é', 'payload.é'])
+def test_malformed_token(token):
+    with pytest.raises(EXC) as exc_info:
+        DownloadTokenSigner('secret').verify(token)
+
+    assert error_code(exc_info) == ErrorCode.DownloadTokenInvalid.value.code
+
+
+def test_tampered_payload():
+    signer = DownloadTokenSigner('secret')
+    token = signer.sign({'p': 'a.txt'}, int(time.time()) + 60)
+    forged = signer.sign({'p': 'b.txt'}, int(time.time()) + 60)
+
+    with pytest.raises(EXC) as exc_info:
+        signer.verify(f"{forged.split('.')[0]}.{token.split('.')[1]}")
+
+    assert error_code(exc_info) == ErrorCode.DownloadTokenInvalid.value.code
+
+
+def test_other_secret():
+    token = DownloadTokenSigner('secret').sign({'p': 'a.txt'}, int(time.time()) + 60)
+
+    with pytest.raises(EXC) as exc_info:
+        DownloadTokenSigner('other').verify(token)
+
+    assert error_code(exc_info) == ErrorCode.DownloadTokenInvalid.value.code
+
+
+def test_expired_token():
+    signer = DownloadTokenSigner('secret')
+    token = signer.sign({'p': 'a.txt'}, int(time.time()) - 1)
+
+    with pytest.raises(EXC) as exc_info:
+        signer.verify(token)
+
+    assert error_code(exc_info) == ErrorCode.DownloadTokenExpired.value.code
@@ -0,0 +1,180 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+import gzip
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+from src.config import TieringConfig
+from src.models import File
+from src.services import FilesService
+from src.services.tiering import AccessTracker, StorageTiering, copy_tier_data, remove_tier_copy
+
+DATA = b'file contents ' * 1000
+
+
+def tmp_files(directory: Path) -> list[Path]:
+    return list(directory.glob('*.tmp'))
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_copy_tier_data_round_trip(tmp_path, compress):
+    src = tmp_path / 'hot' / 'a.bin'
+    src.parent.mkdir()
+    src.write_bytes(DATA)
+    cold = tmp_path / 'cold' / 'nested' / 'a.bin.gz'
+
+    copy_tier_data(str(src), str(cold), compress=compress)
+    back = tmp_path / 'back' / 'a.bin'
+    copy_tier_data(str(cold), str(back), decompress=compress)
+
+    assert (gzip.decompress(cold.read_bytes()) if compress else cold.read_bytes()) == DATA
+    assert back.read_bytes() == DATA
+    assert src.read_bytes() == DATA
+    assert not tmp_files(cold.parent)
+    assert not tmp_files(back.parent)
+
+
+def test_copy_tier_data_removes_temp_file_on_error(tmp_path):
+    src = tmp_path / 'a.bin'
+    src.write_bytes(DATA)
+    dst = tmp_path / 'cold' / 'a.bin'
+
+    with pytest.raises(gzip.BadGzipFile):
+        copy_tier_data(str(src), str(dst), decompress=True)
+
+    assert not dst.exists()
+    assert not tmp_files(dst.parent)
+
+
+def test_copy_tier_data_keeps_existing_target_on_error(tmp_path):
+    dst = tmp_path / 'a.bin'
+    dst.write_bytes(b'previous copy')
+
+    with pytest.raises(FileNotFoundError):
+        copy_tier_data(str(tmp_path / 'missing.bin'), str(dst))
+
+    assert dst.read_bytes() == b'previous copy'
+    assert not tmp_files(tmp_path)
+
+
+def test_remove_tier_copy_keeps_a_copy_written_over_it(tmp_path):
+    src = tmp_path / 'a.bin'
+    src.write_bytes(DATA)
+    dst = tmp_path / 'b.bin'
+
+    first = copy_tier_data(str(src), str(dst))
+    copy_tier_data(str(src), str(dst))
+    remove_tier_copy(str(dst), first)
+    assert dst.exists()
+
+    own = copy_tier_data(str(src), str(dst))
+    remove_tier_copy(str(dst), own)
+    assert not dst.exists()
+
+
+@pytest.mark.parametrize(('compress', 'suffix'), [(False, ''), (True, '.gz')])
+def test_cold_path_for(tmp_path, compress, suffix):
+    base_dir, cold_dir = tmp_path / 'storage', tmp_path / 'cold'
+    tiering = StorageTiering(
+        base_dir=str(base_dir),
+        conf=TieringConfig(cold_dir=str(cold_dir), compress=compress),
+        session_scope=None,
+        lock_connection=None,
+    )
+    file = File(name='report', extension='.pdf', path=str((base_dir / 'docs' / '2025').resolve()))
+
+    assert tiering.cold_path_for(file) == str(cold_dir.resolve() / 'docs' / '2025' / f'report.pdf{suffix}')
+
+
+class FakeConnection:
+    """Records the parameters of executed statements."""
+
+    def __init__(self):
+        """."""
+        self.executed: list[list[dict[str, Any]]] = []
+
+    async def execute(self, _stmt: Any, params: list[dict[str, Any]]) -> None:
+        self.executed.append(params)
+
+
+def make_tracker(conn: FakeConnection) -> AccessTracker:
+    class FakeSession:
+        async def connection(self) -> FakeConnection:
+            return conn
+
+    @asynccontextmanager
+    async def session_scope() -> Any:
+        yield FakeSession()
+
+    return AccessTracker(session_scope)
+
+
+def test_access_tracker_flush_aggregates_accesses():
+    conn = FakeConnection()
+    tracker = make_tracker(conn)
+    file_id = uuid4()
+    tracker.record(file_id)
+    tracker.record(str(file_id))
+
+    assert asyncio.run(tracker.flush()) == 1
+    assert asyncio.run(tracker.flush()) == 0
+    [params] = conn.executed
+    assert [(p['b_id'], p['b_count']) for p in params] == [(file_id, 2)]
+
+
+def test_access_tracker_merges_back_on_failure():
+    conn = FakeConnection()
+    tracker = make_tracker(conn)
+    file_id = uuid4()
+    tracker.record(file_id)
+
+    async def execute_failing(_stmt: Any, _params: list[dict[str, Any]]) -> None:
+        # A download recorded while the flush is in progress
+        tracker.record(file_id)
+        raise ConnectionError('database is down')
+
+    conn.execute = execute_failing
+    with pytest.raises(ConnectionError):
+        asyncio.run(tracker.flush())
+
+    count, last_at = tracker._accesses[file_id]
+    assert count == 2
+    del conn.execute
+    assert asyncio.run(tracker.flush()) == 1
+    [params] = conn.executed
+    assert (params[0]['b_count'], params[0]['b_at']) == (2, last_at)
+
+
+def make_file(directory: Path, **kwargs) -> File:
+    return File(id=uuid4(), name='a', extension='.bin', path=str(directory), updated_at=datetime.now(), **kwargs)
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_move_cold_file_restores_it_at_the_new_path(tmp_path, compressed):
+    cold = tmp_path / 'cold' / 'a.bin.gz'
+    cold.parent.mkdir()
+    cold.write_bytes(gzip.compress(DATA) if compressed else DATA)
+    file = make_file(tmp_path / 'storage', cold_path=str(cold), compressed=compressed)
+    dst = tmp_path / 'storage' / 'moved' / 'b.bin'
+
+    FilesService._move_file_data(file, str(dst))
+
+    assert dst.read_bytes() == DATA
+    # Removed by the caller once the move is committed
+    assert cold.exists()
+    assert not tmp_files(dst.parent)
+
+
+def test_move_hot_file(tmp_path):
+    file = make_file(tmp_path)
+    Path(file.get_hot_path()).write_bytes(DATA)
+    dst = tmp_path / 'moved.bin'
+
+    FilesService._move_file_data(file, str(dst))
+
+    assert dst.read_bytes() == DATA
+    assert not Path(file.get_hot_path()).exists()